@@ -0,0 +1,81 @@
+"""
+throughput benchmark of Outbox enqueue and drain.
+
+drain uses a stub client answering sends after a fixed latency, so the
+numbers show the cost of the outbox itself and how concurrency hides api
+latency.
+
+    python -m benchmarks.bench_outbox
+"""
+import itertools
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from ippanel import Outbox
+
+
+class StubClient:
+    def __init__(self, latency):
+        self.latency = latency
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def send_pattern(self, pattern_code, sender, recipient, values):
+        time.sleep(self.latency)
+        with self.lock:
+            return next(self.ids)
+
+    def send(self, sender, recipients, message, summary):
+        return self.send_pattern(None, sender, None, None)
+
+
+def items(count):
+    return (("pattern", ["6gr7ngjmhi", "9810001", f"+98912{i:07d}", {"code": i}]) for i in range(count))
+
+
+def report(name, count, seconds):
+    print(f"{name:<40} {count:>8} msgs {seconds:>8.3f}s {count / seconds:>10.0f} msg/s")
+
+
+def requeue(path, limit):
+    """
+    mark first limit messages of outbox pending and the rest sent
+    """
+    db = sqlite3.connect(path)
+    with db:
+        db.execute("UPDATE outbox SET state = 'sent'")
+        db.execute("UPDATE outbox SET state = 'pending' WHERE id <= ?", (limit,))
+    db.close()
+
+
+def main(count=20000, latency=0.005):
+    with tempfile.TemporaryDirectory() as directory:
+        with Outbox(os.path.join(directory, "single.db")) as outbox:
+            single = count // 10
+            started = time.perf_counter()
+            for kind, args in items(single):
+                outbox.enqueue_pattern(*args)
+            report("enqueue one per transaction", single, time.perf_counter() - started)
+
+        path = os.path.join(directory, "outbox.db")
+        with Outbox(path) as outbox:
+            started = time.perf_counter()
+            batch = items(count)
+            while outbox.enqueue(itertools.islice(batch, 1000)):
+                pass
+            report("enqueue 1000 per transaction", count, time.perf_counter() - started)
+
+        for concurrency in (1, 16, 64):
+            requeue(path, count // 20 if concurrency == 1 else count // 2)
+            with Outbox(path) as outbox:
+                started = time.perf_counter()
+                counts = outbox.drain(StubClient(latency), batch_size=500, concurrency=concurrency)
+                report(f"drain, {latency * 1000:.0f}ms api, concurrency {concurrency}", counts["sent"],
+                       time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
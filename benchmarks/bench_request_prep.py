@@ -0,0 +1,69 @@
+"""
+micro benchmark of per call request preparation overhead of HTTPClient.
+
+"before" repeats the work HTTPClient.req did on every call before request
+templates: build headers and user agent, build default headers, join the url,
+build a dict of method lambdas and let session.request prepare the request
+and read environment settings. "after" is HTTPClient.prepare. no network is
+used, requests are only prepared.
+
+    python -m benchmarks.bench_request_prep
+"""
+import json
+import sys
+import timeit
+from urllib.parse import urljoin
+
+import requests
+
+from ippanel import BASE_URL, CLIENT_VERSION, DEFAULT_TIMEOUT, HTTPClient
+
+ENDPOINTS = [
+    ("POST", "sms/pattern/normal/send", {"code": "6gr7ngjmhi", "sender": "9810001", "recipient": "+98912xxxxxxx", "variable": {"name": "IPPanel"}}, None),
+    ("GET", "sms/message/show-recipient/message-id/70671101", None, {"page": 1, "per_page": 100}),
+    ("GET", "sms/accounting/credit/show", None, None),
+]
+
+
+def before(session, method, url, data, params):
+    target_url = urljoin(BASE_URL, url)
+    user_agent = f"IPPanel/ApiClient/{CLIENT_VERSION} Python/{sys.hexversion}"
+    headers = {
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+        "apikey": "apikey",
+        "User-Agent": user_agent,
+    }
+    default_headers = requests.utils.default_headers()
+    default_headers.update(headers)
+    methods = {
+        'DELETE': lambda: None,
+        'GET': lambda: None,
+        'PATCH': lambda: None,
+        'POST': lambda: None,
+        'PUT': lambda: None,
+    }
+    methods[method]()
+
+    # what session.request does before sending
+    body = None if method == "GET" else json.dumps(data)
+    prepared = session.prepare_request(requests.Request(method, target_url, headers=headers, data=body, params=params))
+    session.merge_environment_settings(prepared.url, {}, None, None, None)
+    return prepared
+
+
+def main(number=20000):
+    http_client = HTTPClient("apikey", BASE_URL, DEFAULT_TIMEOUT, CLIENT_VERSION, codec="json")
+    session = http_client.session
+
+    print(f"{'endpoint':<50} {'before':>10} {'after':>10}")
+    for method, url, data, params in ENDPOINTS:
+        old = timeit.timeit(lambda: before(session, method, url, data, params), number=number) / number
+        new = timeit.timeit(lambda: http_client.prepare(method, url, data, params), number=number) / number
+        print(f"{method + ' ' + url:<50} {old * 1e6:>8.1f}us {new * 1e6:>8.1f}us")
+
+    http_client.close()
+
+
+if __name__ == "__main__":
+    main()
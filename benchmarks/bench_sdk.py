@@ -0,0 +1,120 @@
+"""
+end to end throughput benchmark of the sdk against the local fake api.
+
+every scenario runs twice: once timed with a latency listener for req/s
+and latency percentiles, once under tracemalloc for peak python memory,
+since tracing slows the code it measures.
+
+    python -m benchmarks.bench_sdk
+    python -m benchmarks.bench_sdk --latency 0.02 --error-rate 0.01 --scenario bulk_pattern
+"""
+import argparse
+import io
+import time
+import tracemalloc
+
+from benchmarks.fakeserver import FakeServer
+from ippanel import CLIENT_VERSION, DEFAULT_TIMEOUT, Client, HTTPClient, LatencyHistograms, RetryPolicy
+
+
+def single_send(sms, args):
+    """
+    sequential sends, one request each
+    """
+    for index in range(args.requests):
+        sms.send("+9810001", [f"+98912{index:07d}"], "Hello", "benchmark")
+    return args.requests
+
+
+def bulk_pattern(sms, args):
+    """
+    pattern sends to many recipients with send_pattern_many
+    """
+    items = ((f"+98912{index:07d}", {"code": index}) for index in range(args.requests))
+    sent = 0
+    for result in sms.send_pattern_many("6gr7ngjmhi", "+9810001", items, concurrency=args.concurrency):
+        sent += result.error is None
+    return sent
+
+
+def paginated_export(sms, args):
+    """
+    csv export of all recipients of a message
+    """
+    return sms.export_statuses(1, io.StringIO(), workers=args.concurrency, page_size=args.page_size)
+
+
+def large_page_parse(sms, args):
+    """
+    one large statuses page per result format
+    """
+    rows = 0
+    for result_format in ("object", "tuple", "columns"):
+        for _ in range(max(1, args.requests // 100)):
+            items, _ = sms.fetch_statuses(1, 0, args.max_page_size, result_format=result_format)
+            rows += len(items)
+    return rows
+
+
+SCENARIOS = {
+    "single_send": single_send,
+    "bulk_pattern": bulk_pattern,
+    "paginated_export": paginated_export,
+    "large_page_parse": large_page_parse,
+}
+
+
+def client(server, listeners=()):
+    http_client = HTTPClient("", server.url, DEFAULT_TIMEOUT, CLIENT_VERSION, listeners=listeners,
+                             retry=RetryPolicy(max_attempts=3, backoff_factor=0.01), pool_maxsize=64)
+    return Client("", http_client)
+
+
+def ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.2f}"
+
+
+def run(name, scenario, server, args):
+    histograms = LatencyHistograms()
+    with client(server, [histograms]) as sms:
+        started = time.perf_counter()
+        items = scenario(sms, args)
+        elapsed = time.perf_counter() - started
+
+    with client(server) as sms:
+        tracemalloc.start()
+        scenario(sms, args)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    requests = sum(stats["count"] for stats in histograms.snapshot().values())
+    print(f"{name:<18} {items:>8} items {requests:>7} reqs {requests / elapsed:>9.0f} req/s "
+          f"p50 {ms(max_percentile(histograms, 'p50')):>7}ms p95 {ms(max_percentile(histograms, 'p95')):>7}ms "
+          f"p99 {ms(max_percentile(histograms, 'p99')):>7}ms peak {peak / 1024 / 1024:>7.2f}MB")
+
+
+def max_percentile(histograms, name):
+    values = [stats[name] for stats in histograms.snapshot().values()]
+    return max(values) if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append")
+    parser.add_argument("--requests", type=int, default=1000, help="sends per send scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added by server to every request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests failed with 503")
+    parser.add_argument("--recipients", type=int, default=20000, help="recipients of the exported message")
+    parser.add_argument("--page-size", type=int, default=500, help="page size of exports")
+    parser.add_argument("--max-page-size", type=int, default=5000, help="largest page served")
+    args = parser.parse_args()
+
+    with FakeServer(latency=args.latency, error_rate=args.error_rate, recipients=args.recipients,
+                    max_page_size=args.max_page_size) as server:
+        for name in args.scenario or SCENARIOS:
+            run(name, SCENARIOS[name], server, args)
+
+
+if __name__ == "__main__":
+    main()
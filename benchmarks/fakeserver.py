@@ -0,0 +1,189 @@
+"""
+local stand-in of the ippanel api for benchmarks.
+
+implements the endpoints used by Client with canned data, an optional
+latency per request, a rate of failed requests and a server side page size
+limit. it is not a faithful copy of the api, only of the response shapes
+the sdk reads.
+
+    python -m benchmarks.fakeserver --port 8080 --latency 0.02
+"""
+import argparse
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# most items returned by one page, like the api limit
+DEFAULT_MAX_PAGE_SIZE = 1000
+
+_STATUSES = re.compile(r"/sms/message/show-recipient/message-id/(\d+)$")
+
+
+def _envelope(data, meta=None):
+    body = {"status": "OK", "code": 200, "error_message": "", "data": data}
+    if meta is not None:
+        body["meta"] = meta
+    return body
+
+
+def _page_meta(total, page, limit):
+    pages = -(-total // limit) if limit else 0
+    return {
+        "total": total,
+        "limit": limit,
+        "page": page,
+        "pages": pages,
+        "prev": page - 1 if page > 0 else None,
+        "next": page + 1 if page + 1 < pages else None,
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately, without this every response
+    # waits for a delayed ack
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.__handle()
+
+    def do_POST(self):
+        self.__handle()
+
+    def __handle(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        if server.latency:
+            time.sleep(server.latency)
+        if server.error_rate and server.random() < server.error_rate:
+            return self.__reply(server.error_status, b"")
+
+        split = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(split.query).items()}
+        try:
+            data = self.__route(self.command, split.path, query, json.loads(body) if body else None)
+        except LookupError:
+            return self.__reply(404, json.dumps(
+                {"status": "ERROR", "code": 404, "error_message": "not found", "data": None}).encode())
+        self.__reply(200, json.dumps(data).encode())
+
+    def __route(self, method, path, query, data):
+        server = self.server
+        if method == "POST":
+            if path.endswith("/sms/send/webservice/single") or path.endswith("/sms/pattern/normal/send"):
+                return _envelope({"message_id": next(server.message_ids)})
+            if path.endswith("/sms/pattern/normal/store"):
+                return _envelope([{"code": "fake%07d" % next(server.message_ids)}])
+            raise LookupError(path)
+
+        if path.endswith("/sms/accounting/credit/show"):
+            return _envelope({"credit": 1000000.0})
+        if path.endswith("/sms/message/all"):
+            return _envelope([{
+                "message_id": int(query.get("message_id", 0)), "number": "+9810001", "message": "Hello",
+                "state": "finish", "type": "normal", "valid": "1", "recipient_count": 1, "exit_count": 1,
+                "part": 1, "cost": 1, "return_cost": 0, "summary": "",
+            }])
+
+        page = int(query.get("page", 0))
+        limit = min(int(query.get("per_page", 10)), server.max_page_size)
+        start, end = page * limit, (page + 1) * limit
+
+        match = _STATUSES.search(path)
+        if match:
+            total = server.recipients
+            deliveries = [
+                {"recipient": f"+98912{index:07d}", "status": "delivered" if index % 10 else "failed"}
+                for index in range(start, min(end, total))
+            ]
+            return _envelope({"deliveries": deliveries}, _page_meta(total, page, limit))
+        if path.endswith("/inbox"):
+            total = server.inbox_size
+            messages = [
+                {"to": "+9810001", "message": f"reply {total - index}", "from": f"+98912{index:07d}",
+                 "created_at": "2026-01-01T00:00:00Z", "type": "normal"}
+                for index in range(start, min(end, total))
+            ]
+            return _envelope(messages, _page_meta(total, page, limit))
+        raise LookupError(path)
+
+    def __reply(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeServer:
+    """
+    fake api served on a background thread, use url as client base url
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, error_rate=0.0, error_status=503,
+                 recipients=10000, inbox_size=1000, max_page_size=DEFAULT_MAX_PAGE_SIZE, seed=0):
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.latency = latency
+        self.server.error_rate = error_rate
+        self.server.error_status = error_status
+        self.server.recipients = recipients
+        self.server.inbox_size = inbox_size
+        self.server.max_page_size = max_page_size
+        self.server.random = random.Random(seed).random
+        self.server.message_ids = itertools.count(1)
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/api/v1/"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests failed with 503")
+    parser.add_argument("--recipients", type=int, default=10000, help="recipients of every message")
+    parser.add_argument("--inbox-size", type=int, default=1000)
+    parser.add_argument("--max-page-size", type=int, default=DEFAULT_MAX_PAGE_SIZE)
+    args = parser.parse_args()
+
+    server = FakeServer(args.host, args.port, args.latency, args.error_rate, recipients=args.recipients,
+                        inbox_size=args.inbox_size, max_page_size=args.max_page_size)
+    print(f"serving fake api on {server.url}")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
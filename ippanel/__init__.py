@@ -1,4 +1,59 @@
-from ippanel.client import Client, BASE_URL, CLIENT_VERSION, DEFAULT_TIMEOUT
-from ippanel.httpclient import HTTPClient
+import sys
+
 from ippanel.errors import Error, HTTPError, ResponseCode
-from ippanel.models import PaginationInfo, Response, Message, Recipient, InboxMessage, Pattern
+from ippanel.models import Columns, PaginationInfo, Response, Message, Recipient, InboxMessage, Pattern
+
+# names exported by submodules that are imported on first access, so code
+# using only models and errors does not pay for the transport stack
+_LAZY = {
+    "ippanel.client": ("Client", "BASE_URL", "CLIENT_VERSION", "DEFAULT_TIMEOUT"),
+    "ippanel.httpclient": ("HTTPClient",),
+    "ippanel.http2client": ("HTTP2Client",),
+    "ippanel.stdlibclient": ("StdlibHTTPClient",),
+    "ippanel.asyncclient": ("AsyncClient",),
+    "ippanel.asynchttpclient": ("AsyncHTTPClient",),
+    "ippanel.breaker": ("CircuitBreaker", "CircuitOpenError"),
+    "ippanel.bulk": ("BulkResult", "ChunkResult"),
+    "ippanel.cache": ("ResponseCache",),
+    "ippanel.credit": ("CreditTracker",),
+    "ippanel.hedge": ("HedgePolicy",),
+    "ippanel.idempotency": ("IdempotencyStore", "SQLiteIdempotencyStore"),
+    "ippanel.inbox": ("InboxSync",),
+    "ippanel.instrument": ("LatencyHistograms", "RequestEvent"),
+    "ippanel.outbox": ("Outbox",),
+    "ippanel.patterns": ("PatternRegistry", "PatternSchema"),
+    "ippanel.ratelimit": ("FileTokenBucket", "RateLimiter", "TokenBucket"),
+    "ippanel.retry": ("RetryPolicy",),
+    "ippanel.tracker": ("AsyncDeliveryTracker", "DeliveryTracker", "StatusChange"),
+}
+_MODULES = {name: module for module, names in _LAZY.items() for name in names}
+
+__all__ = [
+    "Error", "HTTPError", "ResponseCode",
+    "Columns", "PaginationInfo", "Response", "Message", "Recipient", "InboxMessage", "Pattern",
+    *_MODULES,
+]
+
+
+# module __getattr__ needs python 3.7, older versions import everything up front
+if sys.version_info < (3, 7):
+    import importlib
+
+    for _module, _names in _LAZY.items():
+        _imported = importlib.import_module(_module)
+        globals().update((_name, getattr(_imported, _name)) for _name in _names)
+
+
+def __getattr__(name):
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    import importlib
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return __all__
@@ -0,0 +1,268 @@
+from ippanel.asynchttpclient import AsyncHTTPClient
+from ippanel.bulk import DEFAULT_CHUNK_SIZE, DEFAULT_CONCURRENCY, BulkResult, ChunkResult, aimap_unordered, chunked
+from ippanel.client import (
+    BASE_URL,
+    CLIENT_VERSION,
+    DEFAULT_TIMEOUT,
+    create_pattern_params,
+    parse_credit,
+    parse_inbox,
+    parse_message,
+    parse_message_id,
+    parse_pattern_code,
+    parse_statuses,
+    send_params,
+    send_pattern_params,
+)
+from ippanel.httpclient import HTTP1, HTTP2
+from ippanel.pagination import DEFAULT_PAGE_SIZE, DEFAULT_PREFETCH, aiter_pages
+
+# transports an async client can be built with
+ASYNC_TRANSPORTS = (HTTP1, HTTP2)
+
+
+class AsyncClient:
+    ''' ippanel asyncio client class
+    '''
+
+    def __init__(self, apikey, http_client=None, patterns=None, transport=HTTP1, **options):
+        r"""Create an asyncio client
+
+        :param apikey: api key, string.
+        :param http_client: async http client to send requests with, AsyncHTTPClient.
+        :param patterns: registry that created patterns are stored in and pattern values
+            are validated against before sending, PatternRegistry.
+        :param transport: "http1" or "http2" to multiplex requests over http/2
+            connections when no http_client is given, string.
+        :param options: extra options passed to :class:`AsyncHTTPClient <AsyncHTTPClient>`
+            when no http_client is given, e.g. max_connections.
+        """
+        if transport not in ASYNC_TRANSPORTS:
+            raise ValueError(f"transport must be one of {ASYNC_TRANSPORTS}")
+
+        self.client = http_client or AsyncHTTPClient(
+            apikey,
+            BASE_URL,
+            DEFAULT_TIMEOUT,
+            CLIENT_VERSION,
+            http2=transport == HTTP2,
+            **options,
+        )
+        self.apikey = apikey
+        self.patterns = patterns
+
+    async def close(self):
+        r"""Close pooled connections of the underlying http client
+        """
+        await self.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def get_credit(self):
+        r"""Get authenticated user credit
+
+        :return: :class:`float <float>` object
+        :rtype: float
+        """
+        res = await self.client.get("sms/accounting/credit/show")
+
+        return parse_credit(res)
+
+    async def send(self, sender, recipients, message, summary):
+        r"""Send a message from sender to many recipients.
+
+        :param sender: sender number, string.
+        :param recipients: recipients list, list.
+        :param message: message to send, string.
+        :param summary: description of the message to be logged, string.
+        :return: :class:`int <int>` object
+        :rtype: int
+        """
+        res = await self.client.post("sms/send/webservice/single", send_params(sender, recipients, message, summary))
+
+        return parse_message_id(res)
+
+    async def send_campaign(self, sender, recipients, message, summary,
+                            chunk_size=DEFAULT_CHUNK_SIZE, concurrency=DEFAULT_CONCURRENCY):
+        r"""Send a message to a large list of recipients in chunks.
+
+        Recipients are read lazily and split into chunks of chunk_size, each
+        sent as its own message in parallel, so a failed chunk can be sent
+        again on its own.
+
+        :param sender: sender number, string.
+        :param recipients: recipients, iterable.
+        :param message: message to send, string.
+        :param summary: description of the message to be logged, string.
+        :param chunk_size: recipients per request, int.
+        :param concurrency: number of chunks in flight, int.
+        :return: manifest of :class:`ChunkResult <ChunkResult>` ordered by chunk
+        :rtype: []ChunkResult
+        """
+        async def send(chunk):
+            return await self.send(sender, chunk[2], message, summary)
+
+        manifest = []
+        async for (index, start, chunk), message_id, error in aimap_unordered(send, chunked(recipients, chunk_size), concurrency):
+            manifest.append(ChunkResult(index, start, start + len(chunk), message_id, error))
+
+        manifest.sort(key=lambda result: result.index)
+        return manifest
+
+    async def get_message(self, message_id):
+        r"""Get a message brief info
+
+        :param message_id: message id, int.
+        :return: :class:`Message <Message>` object
+        :rtype: models.Message
+        """
+        res = await self.client.get("sms/message/all", {
+            'message_id': message_id,
+        })
+
+        return parse_message(res)
+
+    async def fetch_statuses(self, message_id, page=0, limit=10, result_format="object"):
+        r"""Fetch message recipients status
+
+        :param message_id: message id, int.
+        :param page: page number(start from 0), int.
+        :param limit: fetch limit, int.
+        :param result_format: "object" for models, "tuple" for named tuples or "columns"
+            for a :class:`Columns <Columns>` with a list per field, string.
+        :return: :class:`[]Recipient <[]Recipient>` object
+        :rtype: []models.Recipient
+        """
+        res = await self.client.get(f"sms/message/show-recipient/message-id/{message_id}", {
+            "page": page,
+            "per_page": limit,
+        })
+
+        return parse_statuses(res, result_format)
+
+    async def fetch_inbox(self, page=0, limit=10, result_format="object"):
+        r"""Fetch inbox messages
+
+        :param page: page number(start from 0), int.
+        :param limit: fetch limit, int.
+        :param result_format: "object" for models, "tuple" for named tuples or "columns"
+            for a :class:`Columns <Columns>` with a list per field, string.
+        :return: :class:`[]InboxMessage <[]InboxMessage>` object
+        :rtype: []models.InboxMessage
+        """
+        res = await self.client.get("/inbox", {
+            "page": page,
+            "per_page": limit,
+        })
+
+        return parse_inbox(res, result_format)
+
+    async def iter_statuses(self, message_id, page_size=DEFAULT_PAGE_SIZE, prefetch=DEFAULT_PREFETCH,
+                            result_format="object"):
+        r"""Iterate over all message recipients status
+
+        Pages are fetched lazily, up to prefetch pages ahead of the one being
+        consumed are fetched in background.
+
+        :param message_id: message id, int.
+        :param page_size: recipients fetched per request, int.
+        :param prefetch: number of pages fetched ahead, int.
+        :param result_format: "object", "tuple" or "columns", with "columns" a
+            :class:`Columns <Columns>` is yielded per page, string.
+        :return: async generator of :class:`Recipient <Recipient>` objects
+        :rtype: async generator
+        """
+        async def fetch(page, limit):
+            return await self.fetch_statuses(message_id, page, limit, result_format)
+
+        async for _, recipients, _ in aiter_pages(fetch, page_size, prefetch=prefetch):
+            if result_format == "columns":
+                yield recipients
+            else:
+                for recipient in recipients:
+                    yield recipient
+
+    async def iter_inbox(self, page_size=DEFAULT_PAGE_SIZE, prefetch=DEFAULT_PREFETCH, result_format="object"):
+        r"""Iterate over all inbox messages
+
+        Pages are fetched lazily, up to prefetch pages ahead of the one being
+        consumed are fetched in background.
+
+        :param page_size: messages fetched per request, int.
+        :param prefetch: number of pages fetched ahead, int.
+        :param result_format: "object", "tuple" or "columns", with "columns" a
+            :class:`Columns <Columns>` is yielded per page, string.
+        :return: async generator of :class:`InboxMessage <InboxMessage>` objects
+        :rtype: async generator
+        """
+        async def fetch(page, limit):
+            return await self.fetch_inbox(page, limit, result_format)
+
+        async for _, messages, _ in aiter_pages(fetch, page_size, prefetch=prefetch):
+            if result_format == "columns":
+                yield messages
+            else:
+                for message in messages:
+                    yield message
+
+    async def create_pattern(self, pattern, description, variables, delimiter="%", is_shared=False):
+        r"""Create a pattern
+
+        :param pattern: pattern schema, string.
+        :param description: description of pattern, string.
+        :param variables: variable list, string.
+        :param delimiter: delimiter of variables in pattern, string.
+        :param is_shared: determine that pattern shared or not, bool.
+        :return: :class:`int <int>` object
+        :rtype: int
+        """
+        params = create_pattern_params(pattern, description, variables, delimiter, is_shared)
+
+        res = await self.client.post("sms/pattern/normal/store", params)
+        code = parse_pattern_code(res)
+
+        if self.patterns is not None:
+            self.patterns.register(code, pattern, variables, delimiter)
+
+        return code
+
+    async def send_pattern(self, pattern_code, sender, recipient, values={}):
+        r"""Send message with pattern
+
+        :param pattern_code: pattern code, string.
+        :param sender: sender number, string.
+        :param recipient: recipient number, string.
+        :param values: pattern values, dict.
+        :return: :class:`int <int>` object
+        :rtype: int
+        """
+        if self.patterns is not None:
+            values = self.patterns.validate(pattern_code, values)
+
+        res = await self.client.post("sms/pattern/normal/send", send_pattern_params(pattern_code, sender, recipient, values))
+
+        return parse_message_id(res)
+
+    async def send_pattern_many(self, pattern_code, sender, items, concurrency=DEFAULT_CONCURRENCY):
+        r"""Send pattern messages to many recipients concurrently
+
+        Items are read lazily and results are yielded as soon as each send
+        finishes, so the order of results is not the order of items.
+
+        :param pattern_code: pattern code, string.
+        :param sender: sender number, string.
+        :param items: (recipient, values) pairs, iterable.
+        :param concurrency: number of sends in flight, int.
+        :return: async generator of :class:`BulkResult <BulkResult>` objects
+        :rtype: async generator
+        """
+        async def send(item):
+            _, (recipient, values) = item
+            return await self.send_pattern(pattern_code, sender, recipient, values)
+
+        async for (index, (recipient, _)), message_id, error in aimap_unordered(send, enumerate(items), concurrency):
+            yield BulkResult(index, recipient, message_id, error)
@@ -0,0 +1,132 @@
+import asyncio
+from functools import lru_cache
+from urllib.parse import urljoin
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from ippanel.codec import get_codec
+from ippanel.errors import HTTPError
+from ippanel.http2client import http2_available
+from ippanel.httpclient import (
+    DEFAULT_POOL_MAXSIZE,
+    SUPPORTED_METHODS,
+    SUPPORTED_STATUS_CODES,
+    TEMPLATE_CACHE_SIZE,
+    build_headers,
+    parse_response,
+)
+from ippanel.retry import parse_retry_after
+
+# default number of connections the async pool may open in total
+DEFAULT_MAX_CONNECTIONS = 100
+
+
+class AsyncHTTPClient:
+    def __init__(self, apikey, base_url, timeout, client_version="1.0.0",
+                 max_connections=DEFAULT_MAX_CONNECTIONS, max_keepalive_connections=DEFAULT_POOL_MAXSIZE,
+                 retry=None, rate_limiter=None, codec=None, http2=False):
+        if httpx is None:
+            raise ImportError("httpx is required for async client, install it with `pip install ippanel[async]`")
+
+        self.apikey = apikey
+        self.timeout = timeout
+        self.base_url = base_url
+        self.client_version = client_version
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.retry = retry
+        self.rate_limiter = rate_limiter
+        self.codec = get_codec(codec)
+        # without h2 installed requests go over http/1.1
+        self.http2 = http2 and http2_available()
+        self.headers = build_headers(apikey, client_version)
+        self.__supported_status_codes = SUPPORTED_STATUS_CODES
+        self.__urls = lru_cache(maxsize=TEMPLATE_CACHE_SIZE)(lambda url: urljoin(self.base_url, url))
+        self.__session = None
+
+    @property
+    def session(self):
+        """
+        shared keep-alive connection pool, created on first use
+        """
+        if self.__session is None:
+            self.__session = httpx.AsyncClient(
+                http2=self.http2,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                ),
+            )
+        return self.__session
+
+    async def close(self):
+        """
+        close pooled connections, a new pool is opened if the client is used again
+        """
+        session, self.__session = self.__session, None
+        if session is not None:
+            await session.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def req(self, method, url, data=None, params=None):
+        """
+        make http request with prefixed base url, given data and params
+        """
+        if method not in SUPPORTED_METHODS:
+            raise ValueError(str(method) + " is not in supported methods")
+
+        target_url = self.__urls(url)
+        content = None if method == 'GET' else self.codec.dumps(data)
+
+        attempt = 1
+        while True:
+            if self.rate_limiter is not None:
+                wait = self.rate_limiter.reserve(method, url)
+                if wait:
+                    await asyncio.sleep(wait)
+
+            try:
+                response = await self.session.request(method, target_url, headers=self.headers, content=content, params=params)
+            except httpx.HTTPError as e:
+                delay = self.retry and self.retry.next_delay(
+                    method, attempt, connection_error=isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout)))
+                if delay is None:
+                    raise HTTPError(e)
+            else:
+                delay = self.retry and self.retry.next_delay(
+                    method, attempt, status=response.status_code,
+                    retry_after=parse_retry_after(response.headers.get("Retry-After")))
+                if delay is None:
+                    break
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+        try:
+            if response.status_code not in self.__supported_status_codes:
+                response.raise_for_status()
+        except httpx.HTTPError as e:
+            raise HTTPError(e)
+
+        return parse_response(response.content, self.codec)
+
+    async def get(self, url, params=None):
+        """
+        make http GET request with prefixed base url and given data
+        """
+        return await self.req("GET", url, None, params)
+
+    async def post(self, url, data):
+        """
+        make http POST request with prefixed base url and given data
+        """
+        return await self.req("POST", url, data)
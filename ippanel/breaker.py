@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import deque
+
+from ippanel.errors import HTTPError
+from ippanel.instrument import endpoint_name
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# default number of latest calls the failure rate of an endpoint is taken over
+DEFAULT_WINDOW = 20
+# default number of calls in window before a circuit may open
+DEFAULT_MIN_CALLS = 10
+# default share of failed or slow calls in window that opens a circuit
+DEFAULT_FAILURE_RATE = 0.5
+# default seconds a circuit stays open before it lets probes through
+DEFAULT_OPEN_DURATION = 30
+
+
+class CircuitOpenError(HTTPError):
+    """
+    raised instead of making a request while the circuit of its endpoint is open
+    """
+
+    def __init__(self, endpoint, retry_in):
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+        super(CircuitOpenError, self).__init__(f"circuit of {endpoint} is open, retry in {retry_in:.1f}s")
+
+
+class _Circuit:
+    __slots__ = ("state", "outcomes", "failures", "opened_at", "probes")
+
+    def __init__(self, window):
+        self.state = CLOSED
+        self.outcomes = deque(maxlen=window)
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes = 0
+
+
+class CircuitBreaker:
+    """
+    circuit breaker keeping a circuit per endpoint.
+
+    a call fails when it raises a network error, gets a 5xx status or,
+    with slow_duration set, takes longer than slow_duration seconds. when
+    failure_rate of the latest window calls of an endpoint fail, its circuit
+    opens and calls fail fast with :class:`CircuitOpenError <CircuitOpenError>`
+    for open_duration seconds. then up to half_open_calls probes are let
+    through, the circuit closes if they succeed and opens again if not.
+    """
+
+    def __init__(self, failure_rate=DEFAULT_FAILURE_RATE, window=DEFAULT_WINDOW, min_calls=DEFAULT_MIN_CALLS,
+                 open_duration=DEFAULT_OPEN_DURATION, half_open_calls=1, slow_duration=None):
+        self.failure_rate = failure_rate
+        self.window = window
+        self.min_calls = min(min_calls, window)
+        self.open_duration = open_duration
+        self.half_open_calls = half_open_calls
+        self.slow_duration = slow_duration
+        self.__circuits = {}
+        self.__lock = threading.Lock()
+        self.__stats = {"opened": 0, "rejected": 0, "probes": 0}
+
+    @property
+    def stats(self):
+        """
+        snapshot of breaker counters
+        """
+        with self.__lock:
+            return dict(self.__stats)
+
+    def state(self, url):
+        """
+        state of the circuit of an endpoint, "closed", "open" or "half_open"
+        """
+        circuit = self.__circuits.get(endpoint_name(url))
+        return CLOSED if circuit is None else circuit.state
+
+    def allow(self, method, url):
+        """
+        check that a call to endpoint may be made, raises CircuitOpenError if not
+        """
+        endpoint = endpoint_name(url)
+        with self.__lock:
+            circuit = self.__circuits.get(endpoint)
+            if circuit is None:
+                circuit = self.__circuits[endpoint] = _Circuit(self.window)
+            if circuit.state == CLOSED:
+                return
+
+            retry_in = circuit.opened_at + self.open_duration - time.monotonic()
+            if circuit.state == OPEN and retry_in <= 0:
+                circuit.state = HALF_OPEN
+                circuit.probes = 0
+            if circuit.state == HALF_OPEN and circuit.probes < self.half_open_calls:
+                circuit.probes += 1
+                self.__stats["probes"] += 1
+                return
+
+            self.__stats["rejected"] += 1
+        raise CircuitOpenError(endpoint, max(retry_in, 0.0))
+
+    def record(self, method, url, duration, failed):
+        """
+        record outcome of a call allowed before
+        """
+        failed = failed or (self.slow_duration is not None and duration > self.slow_duration)
+        with self.__lock:
+            circuit = self.__circuits.get(endpoint_name(url))
+            if circuit is None:
+                return
+
+            if circuit.state != CLOSED:
+                if circuit.state == HALF_OPEN:
+                    circuit.probes -= 1
+                    if failed:
+                        self.__open(circuit)
+                    else:
+                        circuit.state = CLOSED
+                        circuit.outcomes.clear()
+                        circuit.failures = 0
+                return
+
+            outcomes = circuit.outcomes
+            if len(outcomes) == outcomes.maxlen:
+                circuit.failures -= outcomes[0]
+            outcomes.append(failed)
+            circuit.failures += failed
+            if len(outcomes) >= self.min_calls and circuit.failures >= self.failure_rate * len(outcomes):
+                self.__open(circuit)
+
+    def release(self, method, url):
+        """
+        give back the probe of an allowed call that ended without an outcome,
+        like one interrupted by KeyboardInterrupt
+        """
+        with self.__lock:
+            circuit = self.__circuits.get(endpoint_name(url))
+            if circuit is not None and circuit.state == HALF_OPEN and circuit.probes > 0:
+                circuit.probes -= 1
+
+    def __open(self, circuit):
+        circuit.state = OPEN
+        circuit.opened_at = time.monotonic()
+        circuit.outcomes.clear()
+        circuit.failures = 0
+        self.__stats["opened"] += 1
@@ -0,0 +1,110 @@
+import itertools
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from ippanel.errors import Error, HTTPError
+
+# default number of requests kept in flight by bulk operations
+DEFAULT_CONCURRENCY = 10
+
+# default number of recipients sent in one request by campaign sends
+DEFAULT_CHUNK_SIZE = 1000
+
+# errors that are reported per item instead of stopping a bulk operation
+ITEM_ERRORS = (Error, HTTPError, ValueError)
+
+BulkResult = namedtuple("BulkResult", ["index", "recipient", "message_id", "error"])
+BulkResult.__doc__ = """
+result of one item of a bulk send, error is None when message_id is set
+"""
+
+ChunkResult = namedtuple("ChunkResult", ["index", "start", "end", "message_id", "error"])
+ChunkResult.__doc__ = """
+result of one chunk of a campaign send, covering recipients[start:end]
+"""
+
+
+def chunked(iterable, size):
+    """
+    split iterable into (index, start, list) chunks of at most size items
+    without reading more than one chunk ahead
+    """
+    if size < 1:
+        raise ValueError("chunk size must be at least 1")
+
+    iterator = iter(iterable)
+    start = 0
+    for index in itertools.count():
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield index, start, chunk
+        start += len(chunk)
+
+
+def imap_unordered(func, iterable, concurrency=DEFAULT_CONCURRENCY):
+    """
+    call func for every item of iterable on a thread pool and yield
+    (item, result, error) as calls finish.
+
+    at most `concurrency` items are pulled from iterable and running at the
+    same time, so neither inputs nor outputs are collected in memory.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    iterator = iter(iterable)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    pending = {}
+    try:
+        for item in itertools.islice(iterator, concurrency):
+            pending[executor.submit(func, item)] = item
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                try:
+                    yield item, future.result(), None
+                except ITEM_ERRORS as e:
+                    yield item, None, e
+
+                for item in itertools.islice(iterator, 1):
+                    pending[executor.submit(func, item)] = item
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+async def aimap_unordered(func, iterable, concurrency=DEFAULT_CONCURRENCY):
+    """
+    await func for every item of iterable and yield (item, result, error) as
+    calls finish, keeping at most `concurrency` calls in flight.
+    """
+    # asyncio is imported by async callers only, it is slow to import
+    import asyncio
+
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    iterator = iter(iterable)
+    pending = {}
+    try:
+        for item in itertools.islice(iterator, concurrency):
+            pending[asyncio.ensure_future(func(item))] = item
+
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                item = pending.pop(task)
+                try:
+                    yield item, task.result(), None
+                except ITEM_ERRORS as e:
+                    yield item, None, e
+
+                for item in itertools.islice(iterator, 1):
+                    pending[asyncio.ensure_future(func(item))] = item
+    finally:
+        for task in pending:
+            task.cancel()
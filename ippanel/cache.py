@@ -0,0 +1,161 @@
+import threading
+import time
+from collections import OrderedDict
+
+from ippanel.models import Columns
+
+# default seconds results of read endpoints are cached for
+DEFAULT_TTLS = {
+    "get_credit": 30,
+    "get_message": 10,
+    "fetch_statuses": 10,
+}
+# default seconds results in a final state are cached for
+DEFAULT_FINAL_TTL = 3600
+# default number of cached results
+DEFAULT_CACHE_SIZE = 1024
+# message states after which a message does not change anymore
+FINAL_MESSAGE_STATES = ("finish", "finished", "done", "sent", "failed", "canceled", "cancelled")
+# recipient statuses after which a delivery does not change anymore
+FINAL_DELIVERY_STATUSES = ("delivered", "failed", "undelivered", "blacklist", "expired", "rejected")
+
+
+def _copy(value):
+    """
+    shallow copy of a cached result, so callers do not share its lists
+    """
+    if isinstance(value, tuple):
+        return tuple(_copy(item) for item in value)
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, Columns):
+        return value.copy()
+    return value
+
+
+class _Flight:
+    """
+    request in flight that concurrent callers of the same key wait for
+    """
+
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResponseCache:
+    """
+    ttl and lru bounded cache of read endpoint results.
+
+    concurrent calls for a key that is not cached share one request: the
+    first caller loads it while others wait for its result. every caller
+    gets its own copy of result lists.
+    """
+
+    def __init__(self, ttls=None, maxsize=DEFAULT_CACHE_SIZE, final_ttl=DEFAULT_FINAL_TTL,
+                 final_message_states=FINAL_MESSAGE_STATES, final_delivery_statuses=FINAL_DELIVERY_STATUSES):
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.maxsize = maxsize
+        self.final_ttl = final_ttl
+        self.final_message_states = final_message_states
+        self.final_delivery_statuses = final_delivery_statuses
+        self.__entries = OrderedDict()
+        self.__flights = {}
+        self.__lock = threading.Lock()
+        self.__stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+
+    @property
+    def stats(self):
+        """
+        snapshot of cache counters
+        """
+        with self.__lock:
+            return dict(self.__stats, size=len(self.__entries))
+
+    def is_final(self, endpoint, value):
+        """
+        check that a result will not change anymore
+        """
+        if endpoint == "get_message":
+            return getattr(value, "state", None) in self.final_message_states
+        if endpoint == "fetch_statuses":
+            items, _ = value
+            statuses = items["status"] if hasattr(items, "columns") else [item.status for item in items]
+            return bool(statuses) and all(status in self.final_delivery_statuses for status in statuses)
+        return False
+
+    def ttl(self, endpoint, value):
+        """
+        seconds a result of endpoint is cached for
+        """
+        if self.is_final(endpoint, value):
+            return self.final_ttl
+        return self.ttls.get(endpoint, 0)
+
+    def fetch(self, endpoint, key, load):
+        """
+        return cached result of endpoint for key, calling load on a miss
+        """
+        key = (endpoint, key)
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self.__entries.move_to_end(key)
+                    self.__stats["hits"] += 1
+                    return _copy(value)
+                del self.__entries[key]
+
+            flight = self.__flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.__flights[key] = _Flight()
+                self.__stats["misses"] += 1
+            else:
+                self.__stats["coalesced"] += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return _copy(flight.value)
+
+        try:
+            flight.value = load()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self.__lock:
+                del self.__flights[key]
+                if flight.error is None:
+                    self.__store(key, endpoint, flight.value)
+            flight.event.set()
+
+        return _copy(flight.value)
+
+    def __store(self, key, endpoint, value):
+        ttl = self.ttl(endpoint, value)
+        if ttl <= 0:
+            return
+
+        self.__entries[key] = (time.monotonic() + ttl, value)
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.maxsize:
+            self.__entries.popitem(last=False)
+            self.__stats["evictions"] += 1
+
+    def invalidate(self, endpoint=None):
+        """
+        drop cached results, of an endpoint only when given
+        """
+        with self.__lock:
+            if endpoint is None:
+                self.__entries.clear()
+                return
+            for key in [key for key in self.__entries if key[0] == endpoint]:
+                del self.__entries[key]
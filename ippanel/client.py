@@ -1,5 +1,10 @@
-from ippanel.httpclient import HTTPClient
-from ippanel.models import Message, Recipient, InboxMessage
+from ippanel.bulk import DEFAULT_CHUNK_SIZE, DEFAULT_CONCURRENCY, BulkResult, ChunkResult, chunked, imap_unordered
+from ippanel.credit import DEFAULT_RESYNC_INTERVAL, CreditTracker
+from ippanel.export import DEFAULT_EXPORT_PAGE_SIZE, DEFAULT_EXPORT_WORKERS, export_statuses
+from ippanel.httpclient import HTTP1, HTTP2, STDLIB, TRANSPORTS, HTTPClient
+from ippanel.models import RESULT_FORMATS, Message, Recipient, InboxMessage
+from ippanel.pagination import DEFAULT_PAGE_SIZE, DEFAULT_PREFETCH, iter_pages
+from ippanel.patterns import PatternSchema
 
 # base url for api
 BASE_URL = "https://api2.ippanel.com/api/v1/"
@@ -9,18 +14,187 @@ DEFAULT_TIMEOUT = 30
 CLIENT_VERSION = "2.0.7"
 
 
+def send_params(sender, recipients, message, summary):
+    """
+    request body of sms/send/webservice/single
+    """
+    return {
+        "sender": sender,
+        "recipient": recipients,
+        "message": message,
+        "description": {
+            "summary": summary,
+            "count_recipient": f"{len(recipients)}"
+        },
+    }
+
+
+def send_pattern_params(pattern_code, sender, recipient, values):
+    """
+    request body of sms/pattern/normal/send
+    """
+    return {
+        "code": pattern_code,
+        "sender": sender,
+        "recipient": recipient,
+        "variable": values,
+    }
+
+
+def create_pattern_params(pattern, description, variables, delimiter, is_shared):
+    """
+    request body of sms/pattern/normal/store
+    """
+    params = {
+        "pattern": pattern,
+        "description": description,
+        "delimiter": delimiter,
+        "variable": [],
+        "is_shared": is_shared,
+    }
+    for variable_name, type in variables.items():
+        params['variable'].append({'name': variable_name, 'type': type})
+
+    return params
+
+
+def parse_credit(res):
+    try:
+        return res.data["credit"]
+    except:
+        raise ValueError("returned response not valid")
+
+
+def parse_message_id(res):
+    try:
+        return res.data["message_id"]
+    except:
+        raise ValueError("returned response not valid")
+
+
+def parse_message(res):
+    try:
+        return Message(res.data[0])
+    except:
+        raise ValueError("returned response not valid")
+
+
+def parse_statuses(res, result_format="object"):
+    if result_format not in RESULT_FORMATS:
+        raise ValueError(f"result format must be one of {RESULT_FORMATS}")
+
+    try:
+        return Recipient.build(res.data["deliveries"], result_format), res.meta
+    except:
+        raise ValueError("returned response not valid")
+
+
+def parse_inbox(res, result_format="object"):
+    if result_format not in RESULT_FORMATS:
+        raise ValueError(f"result format must be one of {RESULT_FORMATS}")
+
+    try:
+        return InboxMessage.build(res.data, result_format), res.meta
+    except:
+        raise ValueError("returned response not valid")
+
+
+def parse_pattern_code(res):
+    try:
+        return res.data[0]["code"]
+    except:
+        raise ValueError("returned response not valid")
+
+
+def transport_class(transport):
+    """
+    http client class of a transport, imported only when it is used
+    """
+    if transport == HTTP2:
+        from ippanel.http2client import HTTP2Client
+        return HTTP2Client
+    if transport == STDLIB:
+        from ippanel.stdlibclient import StdlibHTTPClient
+        return StdlibHTTPClient
+    return HTTPClient
+
+
 class Client:
     ''' ippanel client class
     '''
 
-    def __init__(self, apikey, http_client=None):
-        self.client = http_client or HTTPClient(
-            apikey,
-            BASE_URL,
-            DEFAULT_TIMEOUT,
-            CLIENT_VERSION,
-        )
+    def __init__(self, apikey, http_client=None, cache=None, patterns=None, idempotency=None, transport=HTTP1,
+                 **options):
+        r"""Create a client
+
+        :param apikey: api key, string.
+        :param http_client: http client to send requests with, HTTPClient.
+        :param cache: cache for results of get_credit, get_message and fetch_statuses, ResponseCache.
+        :param patterns: registry that created patterns are stored in and pattern values
+            are validated against before sending, PatternRegistry.
+        :param idempotency: store of message ids by idempotency key of sends, IdempotencyStore.
+        :param transport: "http1" for :class:`HTTPClient <HTTPClient>`, "http2" for
+            :class:`HTTP2Client <HTTP2Client>` or "stdlib" for
+            :class:`StdlibHTTPClient <StdlibHTTPClient>` when no http_client is given, string.
+        :param options: extra options passed to the http client when no
+            http_client is given, e.g. pool_maxsize.
+        """
+        if transport not in TRANSPORTS:
+            raise ValueError(f"transport must be one of {TRANSPORTS}")
+
+        self.client = http_client
+        if http_client is None:
+            self.client = transport_class(transport)(
+                apikey,
+                BASE_URL,
+                DEFAULT_TIMEOUT,
+                CLIENT_VERSION,
+                **options,
+            )
         self.apikey = apikey
+        self.cache = cache
+        self.patterns = patterns
+        self.idempotency = idempotency
+        self.credit = None
+
+    def _cached(self, endpoint, key, load):
+        if self.cache is None:
+            return load()
+        return self.cache.fetch(endpoint, key, load)
+
+    def _idempotent(self, key, send):
+        if key is None:
+            return send()
+        if self.idempotency is None:
+            raise ValueError("idempotency key given but client has no idempotency store")
+        return self.idempotency.run(key, send)
+
+    def track_credit(self, price_per_part, resync_interval=DEFAULT_RESYNC_INTERVAL, low_threshold=None,
+                     pattern_parts=1):
+        r"""Keep a local estimate of credit that sends are charged against
+
+        :param price_per_part: cost of one sms part, float.
+        :param resync_interval: seconds after which balance is read from server again, int.
+        :param low_threshold: balance under which it is read from server after every send, float.
+        :param pattern_parts: sms parts a pattern message is estimated to take, int.
+        :return: :class:`CreditTracker <CreditTracker>` object, also available as client.credit
+        :rtype: CreditTracker
+        """
+        self.credit = CreditTracker(self, price_per_part, resync_interval, low_threshold, pattern_parts)
+        return self.credit
+
+    def close(self):
+        r"""Close pooled connections of the underlying http client
+        """
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
     def get_credit(self):
         r"""Get authenticated user credit
@@ -28,37 +202,64 @@ class Client:
         :return: :class:`float <float>` object
         :rtype: float
         """
-        res = self.client.get("sms/accounting/credit/show")
+        def load():
+            res = self.client.get("sms/accounting/credit/show")
+
+            return parse_credit(res)
 
-        try:
-            return res.data["credit"]
-        except:
-            raise ValueError("returned response not valid")
+        return self._cached("get_credit", (), load)
 
-    def send(self, sender, recipients, message, summary):
+    def send(self, sender, recipients, message, summary, idempotency_key=None):
         r"""Send a message from sender to many recipients.
 
         :param sender: sender number, string.
         :param recipients: recipients list, list.
         :param message: message to send, string.
         :param summary: description of the message to be logged, string.
+        :param idempotency_key: key of this send, the message id of an earlier
+            send with the same key is returned instead of sending again, string.
         :return: :class:`int <int>` object
         :rtype: int
         """
-        res = self.client.post("sms/send/webservice/single", {
-            "sender": sender,
-            "recipient": recipients,
-            "message": message,
-            "description": {
-                "summary": summary,
-                "count_recipient": f"{len(recipients)}"
-            },
-        })
+        cost = None if self.credit is None else self.credit.estimate_send(message, len(recipients))
+
+        def send():
+            res = self.client.post("sms/send/webservice/single", send_params(sender, recipients, message, summary))
+            message_id = parse_message_id(res)
+
+            if cost is not None:
+                self.credit.charge(cost)
+
+            return message_id
+
+        return self._idempotent(idempotency_key, send)
 
-        try:
-            return res.data["message_id"]
-        except:
-            raise ValueError("returned response not valid")
+    def send_campaign(self, sender, recipients, message, summary,
+                      chunk_size=DEFAULT_CHUNK_SIZE, concurrency=DEFAULT_CONCURRENCY):
+        r"""Send a message to a large list of recipients in chunks.
+
+        Recipients are read lazily and split into chunks of chunk_size, each
+        sent as its own message in parallel, so a failed chunk can be sent
+        again on its own.
+
+        :param sender: sender number, string.
+        :param recipients: recipients, iterable.
+        :param message: message to send, string.
+        :param summary: description of the message to be logged, string.
+        :param chunk_size: recipients per request, int.
+        :param concurrency: number of chunks in flight, int.
+        :return: manifest of :class:`ChunkResult <ChunkResult>` ordered by chunk
+        :rtype: []ChunkResult
+        """
+        def send(chunk):
+            return self.send(sender, chunk[2], message, summary)
+
+        manifest = []
+        for (index, start, chunk), message_id, error in imap_unordered(send, chunked(recipients, chunk_size), concurrency):
+            manifest.append(ChunkResult(index, start, start + len(chunk), message_id, error))
+
+        manifest.sort(key=lambda result: result.index)
+        return manifest
 
     def get_message(self, message_id):
         r"""Get a message brief info
@@ -67,43 +268,46 @@ class Client:
         :return: :class:`Message <Message>` object
         :rtype: models.Message
         """
-        res = self.client.get("sms/message/all", {
-            'message_id': message_id,
-        })
+        def load():
+            res = self.client.get("sms/message/all", {
+                'message_id': message_id,
+            })
 
-        try:
-            return Message(res.data[0])
-        except:
-            raise ValueError("returned response not valid")
+            return parse_message(res)
 
-    def fetch_statuses(self, message_id, page=0, limit=10):
+        return self._cached("get_message", message_id, load)
+
+    def fetch_statuses(self, message_id, page=0, limit=10, result_format="object", cache=True):
         r"""Fetch message recipients status
 
         :param message_id: message id, int.
         :param page: page number(start from 0), int.
         :param limit: fetch limit, int.
+        :param result_format: "object" for models, "tuple" for named tuples or "columns"
+            for a :class:`Columns <Columns>` with a list per field, string.
+        :param cache: use the response cache of the client if it has one, bool.
         :return: :class:`[]Recipient <[]Recipient>` object
         :rtype: []models.Recipient
         """
-        res = self.client.get(f"sms/message/show-recipient/message-id/{message_id}", {
-            "page": page,
-            "per_page": limit,
-        })
+        def load():
+            res = self.client.get(f"sms/message/show-recipient/message-id/{message_id}", {
+                "page": page,
+                "per_page": limit,
+            })
 
-        try:
-            recipients = []
-            for recipient in res.data["deliveries"]:
-                recipients.append(Recipient(recipient))
+            return parse_statuses(res, result_format)
 
-            return recipients, res.meta
-        except:
-            raise ValueError("returned response not valid")
+        if not cache:
+            return load()
+        return self._cached("fetch_statuses", (message_id, page, limit, result_format), load)
 
-    def fetch_inbox(self, page=0, limit=10):
+    def fetch_inbox(self, page=0, limit=10, result_format="object"):
         r"""Fetch inbox messages
 
         :param page: page number(start from 0), int.
         :param limit: fetch limit, int.
+        :param result_format: "object" for models, "tuple" for named tuples or "columns"
+            for a :class:`Columns <Columns>` with a list per field, string.
         :return: :class:`[]InboxMessage <[]InboxMessage>` object
         :rtype: []models.InboxMessage
         """
@@ -112,14 +316,72 @@ class Client:
             "per_page": limit,
         })
 
-        try:
-            messages = []
-            for message in res.data:
-                messages.append(InboxMessage(message))
+        return parse_inbox(res, result_format)
+
+    def iter_statuses(self, message_id, page_size=DEFAULT_PAGE_SIZE, prefetch=DEFAULT_PREFETCH,
+                      result_format="object"):
+        r"""Iterate over all message recipients status
+
+        Pages are fetched lazily, up to prefetch pages ahead of the one being
+        consumed are fetched in background. Pages are not kept in the response
+        cache, so memory stays bounded by the pages in flight.
+
+        :param message_id: message id, int.
+        :param page_size: recipients fetched per request, int.
+        :param prefetch: number of pages fetched ahead, int.
+        :param result_format: "object", "tuple" or "columns", with "columns" a
+            :class:`Columns <Columns>` is yielded per page, string.
+        :return: generator of :class:`Recipient <Recipient>` objects
+        :rtype: generator
+        """
+        def fetch(page, limit):
+            return self.fetch_statuses(message_id, page, limit, result_format, cache=False)
+
+        for _, recipients, _ in iter_pages(fetch, page_size, prefetch=prefetch):
+            if result_format == "columns":
+                yield recipients
+            else:
+                yield from recipients
 
-            return messages, res.meta
-        except:
-            raise ValueError("returned response not valid")
+    def export_statuses(self, message_id, out, workers=DEFAULT_EXPORT_WORKERS, format="csv",
+                        page_size=DEFAULT_EXPORT_PAGE_SIZE, checkpoint=None):
+        r"""Export all message recipients status to a file or stream
+
+        The first page is fetched to learn the page count, the rest are
+        fetched concurrently and written in page order.
+
+        :param message_id: message id, int.
+        :param out: file path or text stream to write to.
+        :param workers: number of pages fetched concurrently, int.
+        :param format: output format, "csv" or "jsonl".
+        :param page_size: recipients fetched per request, int.
+        :param checkpoint: path of a file to save progress in, resumes from it if exists, string.
+        :return: :class:`int <int>` number of exported recipients
+        :rtype: int
+        """
+        return export_statuses(self, message_id, out, workers, format, page_size, checkpoint)
+
+    def iter_inbox(self, page_size=DEFAULT_PAGE_SIZE, prefetch=DEFAULT_PREFETCH, result_format="object"):
+        r"""Iterate over all inbox messages
+
+        Pages are fetched lazily, up to prefetch pages ahead of the one being
+        consumed are fetched in background.
+
+        :param page_size: messages fetched per request, int.
+        :param prefetch: number of pages fetched ahead, int.
+        :param result_format: "object", "tuple" or "columns", with "columns" a
+            :class:`Columns <Columns>` is yielded per page, string.
+        :return: generator of :class:`InboxMessage <InboxMessage>` objects
+        :rtype: generator
+        """
+        def fetch(page, limit):
+            return self.fetch_inbox(page, limit, result_format)
+
+        for _, messages, _ in iter_pages(fetch, page_size, prefetch=prefetch):
+            if result_format == "columns":
+                yield messages
+            else:
+                yield from messages
 
     def create_pattern(self, pattern, description, variables, delimiter="%", is_shared=False):
         r"""Create a pattern
@@ -132,42 +394,71 @@ class Client:
         :return: :class:`int <int>` object
         :rtype: int
         """
-        params = {
-            "pattern": pattern,
-            "description": description,
-            "delimiter": delimiter,
-            "variable": [],
-            "is_shared": is_shared,
-        }
-        for variable_name, type in variables.items():
-            params['variable'].append({'name': variable_name, 'type': type})
+        params = create_pattern_params(pattern, description, variables, delimiter, is_shared)
+        # checked before creating it, a pattern the registry rejects would be left unregistered
+        schema = PatternSchema(None, pattern, variables, delimiter) if self.patterns is not None else None
 
         res = self.client.post("sms/pattern/normal/store", params)
+        code = parse_pattern_code(res)
 
-        try:
-            return res.data[0]["code"]
-        except:
-            raise ValueError("returned response not valid")
+        if schema is not None:
+            schema.code = code
+            self.patterns.add(schema)
 
-    def send_pattern(self, pattern_code, sender, recipient, values={}):
+        return code
+
+    def send_pattern(self, pattern_code, sender, recipient, values={}, idempotency_key=None):
         r"""Send message with pattern
 
         :param pattern_code: pattern code, string.
         :param sender: sender number, string.
         :param recipient: recipient number, string.
         :param values: pattern values, dict.
+        :param idempotency_key: key of this send, the message id of an earlier
+            send with the same key is returned instead of sending again, string.
         :return: :class:`int <int>` object
         :rtype: int
         """
+        schema = None
+        if self.patterns is not None:
+            schema = self.patterns.get(pattern_code)
+            if schema is not None:
+                values = schema.validate(values)
 
-        res = self.client.post("sms/pattern/normal/send", {
-            "code": pattern_code,
-            "sender": sender,
-            "recipient": recipient,
-            "variable": values,
-        })
+        # estimated before sending, nothing after a successful send may raise
+        # and lose its message id
+        cost = None
+        if self.credit is not None:
+            cost = self.credit.estimate_pattern() if schema is None else self.credit.estimate_send(
+                schema.render(values), 1)
+
+        def send():
+            res = self.client.post("sms/pattern/normal/send", send_pattern_params(pattern_code, sender, recipient, values))
+            message_id = parse_message_id(res)
+
+            if cost is not None:
+                self.credit.charge(cost)
+
+            return message_id
+
+        return self._idempotent(idempotency_key, send)
+
+    def send_pattern_many(self, pattern_code, sender, items, concurrency=DEFAULT_CONCURRENCY):
+        r"""Send pattern messages to many recipients concurrently
+
+        Items are read lazily and results are yielded as soon as each send
+        finishes, so the order of results is not the order of items.
+
+        :param pattern_code: pattern code, string.
+        :param sender: sender number, string.
+        :param items: (recipient, values) pairs, iterable.
+        :param concurrency: number of sends in flight, int.
+        :return: generator of :class:`BulkResult <BulkResult>` objects
+        :rtype: generator
+        """
+        def send(item):
+            _, (recipient, values) = item
+            return self.send_pattern(pattern_code, sender, recipient, values)
 
-        try:
-            return res.data["message_id"]
-        except:
-            raise ValueError("returned response not valid")
+        for (index, (recipient, _)), message_id, error in imap_unordered(send, enumerate(items), concurrency):
+            yield BulkResult(index, recipient, message_id, error)
@@ -0,0 +1,71 @@
+import json
+
+
+class Codec:
+    """
+    json codec, dumps returns utf-8 bytes and loads reads bytes directly
+    """
+
+    def __init__(self, name, dumps, loads):
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+
+    def __repr__(self):
+        return f"Codec({self.name})"
+
+
+def _orjson():
+    import orjson
+    return Codec("orjson", orjson.dumps, orjson.loads)
+
+
+def _msgspec():
+    import msgspec
+    return Codec("msgspec", msgspec.json.Encoder().encode, msgspec.json.Decoder().decode)
+
+
+def _ujson():
+    import ujson
+    return Codec("ujson", lambda obj: ujson.dumps(obj, ensure_ascii=False).encode(), ujson.loads)
+
+
+def _json():
+    return Codec("json", lambda obj: json.dumps(obj, ensure_ascii=False).encode(), json.loads)
+
+
+# codec factories by name, in order of preference
+CODECS = {
+    "orjson": _orjson,
+    "msgspec": _msgspec,
+    "ujson": _ujson,
+    "json": _json,
+}
+
+_default_codec = None
+
+
+def get_codec(codec=None):
+    """
+    resolve a codec from its name or return given codec object.
+
+    without a name the fastest installed codec is used, falling back to the
+    json module of standard library.
+    """
+    global _default_codec
+
+    if isinstance(codec, Codec):
+        return codec
+    if codec is not None:
+        if codec not in CODECS:
+            raise ValueError(f"codec must be one of {tuple(CODECS)}")
+        return CODECS[codec]()
+
+    if _default_codec is None:
+        for factory in CODECS.values():
+            try:
+                _default_codec = factory()
+                break
+            except ImportError:
+                continue
+    return _default_codec
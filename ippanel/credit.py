@@ -0,0 +1,87 @@
+import threading
+import time
+
+from ippanel.segments import count_parts
+
+# default seconds after which the local balance is synced with server
+DEFAULT_RESYNC_INTERVAL = 300
+
+
+class CreditTracker:
+    """
+    local estimate of account credit.
+
+    the balance is read from server once and then reduced by the estimated
+    cost of every successful send, so balance checks need no request. it is
+    synced again after resync_interval seconds or when it falls below
+    low_threshold.
+    """
+
+    def __init__(self, client, price_per_part, resync_interval=DEFAULT_RESYNC_INTERVAL, low_threshold=None,
+                 pattern_parts=1, parts=count_parts):
+        self.client = client
+        self.price_per_part = price_per_part
+        self.resync_interval = resync_interval
+        self.low_threshold = low_threshold
+        self.pattern_parts = pattern_parts
+        self.parts = parts
+        self.__balance = None
+        self.__synced_at = None
+        self.__stale = True
+        self.__lock = threading.Lock()
+
+    def sync(self):
+        """
+        read balance from server and drop local estimate
+        """
+        cache = getattr(self.client, "cache", None)
+        if cache is not None:
+            cache.invalidate("get_credit")
+
+        balance = self.client.get_credit()
+        with self.__lock:
+            self.__balance = balance
+            self.__synced_at = time.monotonic()
+            self.__stale = False
+        return balance
+
+    @property
+    def balance(self):
+        """
+        estimated balance, synced with server when it is due
+        """
+        with self.__lock:
+            due = self.__stale or time.monotonic() - self.__synced_at >= self.resync_interval
+            balance = self.__balance
+        if due:
+            return self.sync()
+        return balance
+
+    def can_afford(self, cost):
+        """
+        check that estimated balance covers cost
+        """
+        return self.balance >= cost
+
+    def estimate_send(self, message, recipients_count):
+        """
+        estimated cost of sending message to recipients_count recipients
+        """
+        return self.parts(message) * recipients_count * self.price_per_part
+
+    def estimate_pattern(self, recipients_count=1):
+        """
+        estimated cost of sending a pattern message
+        """
+        return self.pattern_parts * recipients_count * self.price_per_part
+
+    def charge(self, cost):
+        """
+        subtract cost of a successful send from estimated balance
+        """
+        with self.__lock:
+            if self.__balance is None:
+                return
+            self.__balance -= cost
+            if self.low_threshold is not None and self.__balance < self.low_threshold:
+                self.__stale = True
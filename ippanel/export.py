@@ -0,0 +1,110 @@
+import csv
+import json
+import os
+
+from ippanel.models import Recipient
+from ippanel.pagination import iter_pages
+
+# default number of pages fetched concurrently by exports
+DEFAULT_EXPORT_WORKERS = 4
+# default number of recipients fetched per page by exports
+DEFAULT_EXPORT_PAGE_SIZE = 500
+# recipient fields written by status exports
+STATUS_FIELDS = Recipient.fields
+
+FORMATS = ("csv", "jsonl")
+
+
+def load_checkpoint(path):
+    """
+    read export checkpoint, None when there is nothing to resume
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(path, state):
+    """
+    atomically replace export checkpoint with state
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_rows(out, format, rows, header):
+    if format == "csv":
+        writer = csv.writer(out)
+        if header:
+            writer.writerow(STATUS_FIELDS)
+        writer.writerows(rows)
+    else:
+        for row in rows:
+            out.write(json.dumps(dict(zip(STATUS_FIELDS, row)), ensure_ascii=False))
+            out.write("\n")
+
+
+def export_statuses(client, message_id, out, workers=DEFAULT_EXPORT_WORKERS, format="csv",
+                    page_size=DEFAULT_EXPORT_PAGE_SIZE, checkpoint=None):
+    """
+    write all recipients status of a message to out in page order.
+
+    out is a file path or a text stream. pages after the first are fetched
+    by `workers` threads with at most `workers` pages held in memory. when
+    checkpoint path is given, progress is saved there after each page and a
+    later call with the same arguments resumes after the last written page.
+    returns number of written rows.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}")
+
+    state = load_checkpoint(checkpoint) if checkpoint else None
+    if state is not None and (state["message_id"] != message_id or state["page_size"] != page_size
+                              or state["format"] != format):
+        raise ValueError("checkpoint belongs to another export")
+    if state is None:
+        state = {"message_id": message_id, "page_size": page_size, "format": format,
+                 "next_page": 0, "offset": 0, "rows": 0, "done": False}
+    if state["done"]:
+        return state["rows"]
+
+    is_path = isinstance(out, (str, os.PathLike))
+    if is_path:
+        stream = open(out, "r+" if state["next_page"] else "w", newline="", encoding="utf-8")
+        # drop anything written after the last checkpoint
+        stream.seek(state["offset"])
+        stream.truncate()
+    else:
+        stream = out
+
+    def fetch(page, limit):
+        # a full report would fill the response cache
+        return client.fetch_statuses(message_id, page, limit, result_format="tuple", cache=False)
+
+    try:
+        pages = iter_pages(fetch, page_size, start_page=state["next_page"], prefetch=workers)
+        for page, rows, meta in pages:
+            write_rows(stream, format, rows, header=page == 0)
+            stream.flush()
+
+            state["next_page"] = page + 1
+            state["rows"] += len(rows)
+            if is_path:
+                state["offset"] = stream.tell()
+            if checkpoint:
+                save_checkpoint(checkpoint, state)
+
+        state["done"] = True
+        if checkpoint:
+            save_checkpoint(checkpoint, state)
+    finally:
+        if is_path:
+            stream.close()
+
+    return state["rows"]
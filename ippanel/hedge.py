@@ -0,0 +1,73 @@
+import threading
+
+from ippanel.instrument import LatencyHistograms, endpoint_name
+
+# methods of reads that may be sent twice
+HEDGED_METHODS = ("GET",)
+# default percentile of endpoint latency after which a read is hedged
+DEFAULT_HEDGE_PERCENTILE = 95
+# default seconds before hedging while an endpoint has too few samples
+DEFAULT_HEDGE_DELAY = 1.0
+# default number of requests of an endpoint before its percentile is used
+DEFAULT_MIN_SAMPLES = 20
+# default most share of reads that may be hedged
+DEFAULT_MAX_HEDGE_RATIO = 0.1
+
+
+class HedgePolicy:
+    """
+    when to send a second copy of a slow read.
+
+    a GET that takes longer than the given percentile of its endpoint's
+    network latency is sent again and the first response is used. at most
+    max_ratio of reads are hedged so a slow api is not sent twice the load.
+    latencies are learned by histograms, which HTTPClient subscribes to
+    its requests.
+    """
+
+    def __init__(self, percentile=DEFAULT_HEDGE_PERCENTILE, delay=DEFAULT_HEDGE_DELAY, min_delay=0.0,
+                 min_samples=DEFAULT_MIN_SAMPLES, max_ratio=DEFAULT_MAX_HEDGE_RATIO, histograms=None):
+        self.percentile = percentile
+        self.default_delay = delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.max_ratio = max_ratio
+        self.histograms = histograms or LatencyHistograms()
+        self.__lock = threading.Lock()
+        self.__stats = {"reads": 0, "hedged": 0, "hedge_wins": 0}
+
+    @property
+    def stats(self):
+        """
+        snapshot of hedging counters
+        """
+        with self.__lock:
+            return dict(self.__stats)
+
+    def delay(self, method, url):
+        """
+        seconds to wait for a request before hedging it, None if it is not hedged
+        """
+        if method not in HEDGED_METHODS:
+            return None
+        with self.__lock:
+            self.__stats["reads"] += 1
+
+        delay = self.histograms.percentile(
+            endpoint_name(url), self.percentile, "network", method, self.min_samples)
+        return max(self.min_delay, self.default_delay if delay is None else delay)
+
+    def acquire(self):
+        """
+        take a hedge from budget, False when too many reads were hedged
+        """
+        with self.__lock:
+            stats = self.__stats
+            if stats["hedged"] + 1 > self.max_ratio * stats["reads"]:
+                return False
+            stats["hedged"] += 1
+            return True
+
+    def won(self):
+        with self.__lock:
+            self.__stats["hedge_wins"] += 1
@@ -0,0 +1,161 @@
+import threading
+import time
+from functools import lru_cache
+from urllib.parse import urljoin
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+from ippanel.codec import get_codec
+from ippanel.errors import HTTPError
+from ippanel.httpclient import (
+    SUPPORTED_METHODS,
+    SUPPORTED_STATUS_CODES,
+    TEMPLATE_CACHE_SIZE,
+    build_headers,
+    parse_response,
+)
+from ippanel.retry import parse_retry_after
+
+# default number of connections opened per host, with http/2 each carries
+# many concurrent requests so few are needed
+DEFAULT_HTTP2_MAX_CONNECTIONS = 10
+
+
+def http2_available():
+    """
+    check that httpx and h2 needed for http/2 are installed
+    """
+    return httpx is not None and h2 is not None
+
+
+class HTTP2Client:
+    """
+    http client multiplexing concurrent requests over http/2 connections.
+
+    http/2 is negotiated with the server, requests go over http/1.1 when
+    the server or the installed packages do not support it. it is a drop
+    in replacement of :class:`HTTPClient <HTTPClient>` and may be shared by
+    threads.
+    """
+
+    def __init__(self, apikey, base_url, timeout, client_version="1.0.0",
+                 max_connections=DEFAULT_HTTP2_MAX_CONNECTIONS, max_keepalive_connections=None,
+                 retry=None, rate_limiter=None, codec=None, http2=True):
+        if httpx is None:
+            raise ImportError("httpx is required for http/2 client, install it with `pip install ippanel[http2]`")
+
+        self.apikey = apikey
+        self.timeout = timeout
+        self.base_url = base_url
+        self.client_version = client_version
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.retry = retry
+        self.rate_limiter = rate_limiter
+        self.codec = get_codec(codec)
+        self.http2 = http2 and http2_available()
+        self.headers = build_headers(apikey, client_version)
+        self.http_version = None
+        self.__supported_status_codes = SUPPORTED_STATUS_CODES
+        self.__urls = lru_cache(maxsize=TEMPLATE_CACHE_SIZE)(lambda url: urljoin(self.base_url, url))
+        self.__session = None
+        self.__session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """
+        shared connection pool, created on first use
+        """
+        session = self.__session
+        if session is None:
+            with self.__session_lock:
+                session = self.__session
+                if session is None:
+                    session = self.__session = httpx.Client(
+                        http2=self.http2,
+                        timeout=self.timeout,
+                        headers=self.headers,
+                        limits=httpx.Limits(
+                            max_connections=self.max_connections,
+                            max_keepalive_connections=self.max_keepalive_connections,
+                        ),
+                    )
+        return session
+
+    def close(self):
+        """
+        close pooled connections, a new pool is opened if the client is used again
+        """
+        with self.__session_lock:
+            session, self.__session = self.__session, None
+        if session is not None:
+            session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def req(self, method, url, data=None, params=None):
+        """
+        make http request with prefixed base url, given data and params
+        """
+        if method not in SUPPORTED_METHODS:
+            raise ValueError(str(method) + " is not in supported methods")
+
+        target_url = self.__urls(url)
+        content = None if method == 'GET' else self.codec.dumps(data)
+
+        attempt = 1
+        while True:
+            if self.rate_limiter is not None:
+                wait = self.rate_limiter.reserve(method, url)
+                if wait:
+                    time.sleep(wait)
+
+            try:
+                response = self.session.request(method, target_url, content=content, params=params)
+            except httpx.HTTPError as e:
+                delay = self.retry and self.retry.next_delay(
+                    method, attempt, connection_error=isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout)))
+                if delay is None:
+                    raise HTTPError(e)
+            else:
+                delay = self.retry and self.retry.next_delay(
+                    method, attempt, status=response.status_code,
+                    retry_after=parse_retry_after(response.headers.get("Retry-After")))
+                if delay is None:
+                    break
+
+            time.sleep(delay)
+            attempt += 1
+
+        self.http_version = response.http_version
+        try:
+            if response.status_code not in self.__supported_status_codes:
+                response.raise_for_status()
+        except httpx.HTTPError as e:
+            raise HTTPError(e)
+
+        return parse_response(response.content, self.codec)
+
+    def get(self, url, params=None):
+        """
+        make http GET request with prefixed base url and given data
+        """
+        return self.req("GET", url, None, params)
+
+    def post(self, url, data):
+        """
+        make http POST request with prefixed base url and given data
+        """
+        return self.req("POST", url, data)
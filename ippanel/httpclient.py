@@ -1,66 +1,404 @@
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from functools import lru_cache, partial
 
-import requests
-from requests import RequestException
+from ippanel.codec import get_codec
 from ippanel.errors import HTTPError, parse_errors
+from ippanel.instrument import RequestTimer, endpoint_name
 from ippanel.models import Response
-from urllib.parse import urljoin
-import json
+from ippanel.retry import parse_retry_after
+from urllib.parse import urlencode, urljoin
+
+# default number of per-host connection pools kept by the session
+DEFAULT_POOL_CONNECTIONS = 10
+# default number of keep-alive connections kept open per host
+DEFAULT_POOL_MAXSIZE = 10
+# status codes that carry an api response body
+SUPPORTED_STATUS_CODES = [200, 201, 204, 400, 401, 403, 404, 405, 422, 500]
+# http methods api requests are made with
+SUPPORTED_METHODS = ('DELETE', 'GET', 'PATCH', 'POST', 'PUT')
+# number of endpoint request templates kept by a client
+TEMPLATE_CACHE_SIZE = 128
+
+# transports a client can be built with: requests, http/2 with httpx or
+# http.client of standard library
+HTTP1 = "http1"
+HTTP2 = "http2"
+STDLIB = "stdlib"
+TRANSPORTS = (HTTP1, HTTP2, STDLIB)
+
+
+def _requests():
+    """
+    requests module, imported on first use since it takes most of the
+    import time of the sdk
+    """
+    module = globals().get("requests")
+    if module is None:
+        import requests as module
+        globals()["requests"] = module
+    return module
+
+
+def __getattr__(name):
+    if name == "requests":
+        return _requests()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# module __getattr__ needs python 3.7, older versions import requests up front
+if sys.version_info < (3, 7):
+    _requests()
+
+
+def build_headers(apikey, client_version):
+    """
+    headers sent with every api request
+    """
+    return {
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+        "apikey": apikey,
+        "User-Agent": f"IPPanel/ApiClient/{client_version} Python/{sys.hexversion}",
+    }
+
+
+def parse_response(content, codec=None):
+    """
+    build api response from raw response body and raise its error if any
+    """
+    parsed_response = Response((codec or get_codec()).loads(content))
+    errors = parse_errors(parsed_response)
+
+    if isinstance(errors, Exception):
+        raise errors
+
+    return parsed_response
+
+
+def _not_sent(error):
+    """
+    check that a requests error was raised before the request was sent.
+
+    requests.ConnectionError also wraps connections dropped after the body
+    was written, only connect timeouts and failures opening a connection
+    (refused, dns) are told apart by the urllib3 errors they wrap.
+    """
+    requests = _requests()
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.ConnectionError):
+        return False
+
+    from urllib3.exceptions import NewConnectionError
+
+    errors = [error]
+    seen = set()
+    while errors:
+        error = errors.pop()
+        if not isinstance(error, BaseException) or id(error) in seen:
+            continue
+        seen.add(id(error))
+        if isinstance(error, NewConnectionError):
+            return True
+        errors.append(error.__context__)
+        errors.append(getattr(error, "reason", None))
+        errors.extend(arg for arg in error.args if isinstance(arg, BaseException))
+    return False
+
+
+def _close_unused(used, future):
+    if not future.cancelled() and future.exception() is None and future.result() is not used:
+        future.result().close()
 
 
 class HTTPClient:
-    def __init__(self, apikey, base_url, timeout, client_version="1.0.0"):
+    def __init__(self, apikey, base_url, timeout, client_version="1.0.0",
+                 pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 pool_block=False, retry=None, rate_limiter=None, codec=None, listeners=None,
+                 timeouts=None, breaker=None, hedge=None):
         self.apikey = apikey
         self.timeout = timeout
+        # timeouts by endpoint, a number or a (connect, read) tuple like timeout
+        self.timeouts = dict(timeouts or {})
         self.base_url = base_url
         self.client_version = client_version
-        self.__supported_status_codes = [200, 201, 204, 400, 401, 403, 404, 405, 422, 500]
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.retry = retry
+        self.rate_limiter = rate_limiter
+        self.codec = get_codec(codec)
+        self.headers = build_headers(apikey, client_version)
+        self.listeners = tuple(listeners or ())
+        self.breaker = breaker
+        self.hedge = hedge
+        if hedge is not None and hedge.histograms not in self.listeners:
+            self.listeners += (hedge.histograms,)
+        self.__supported_status_codes = SUPPORTED_STATUS_CODES
+        self.__templates = lru_cache(maxsize=TEMPLATE_CACHE_SIZE)(self.__template)
+        self.__session = None
+        self.__session_lock = threading.Lock()
+        self.__executor = None
+        # hedge workers, a hedged read is sent only when one is free so it never queues
+        self.__hedge_workers = 2 * pool_maxsize
+        self.__hedge_busy = 0
+        self.__hedge_lock = threading.Lock()
 
-    def req(self, method, url, data=None, params=None):
+    @property
+    def session(self):
         """
-        make http request with prefixed base url, given data and params
+        shared keep-alive session, created on first use
+        """
+        session = self.__session
+        if session is None:
+            with self.__session_lock:
+                session = self.__session
+                if session is None:
+                    session = self.__session = self._create_session()
+        return session
+
+    def _create_session(self):
+        """
+        build a session whose connection pool is bounded by the pool settings.
+
+        pool_connections is the number of hosts a pool is cached for, pool_maxsize
+        is the number of keep-alive connections per host and pool_block makes
+        callers wait for a free connection instead of opening extra ones.
+        """
+        requests = _requests()
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def close(self):
+        """
+        close pooled connections, a new session is opened if the client is used again
+        """
+        with self.__session_lock:
+            session, self.__session = self.__session, None
+            executor, self.__executor = self.__executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        if session is not None:
+            session.close()
+
+    def add_listener(self, listener):
+        """
+        call listener with a :class:`RequestEvent <RequestEvent>` after every request
+        """
+        self.listeners = self.listeners + (listener,)
+
+    def remove_listener(self, listener):
+        self.listeners = tuple(item for item in self.listeners if item is not listener)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __template(self, method, url):
         """
-        if params is None:
-            params = {}
+        prepared request and send settings of an endpoint.
 
+        resolving the url, merging headers with session defaults and reading
+        proxy settings from environment are done once per endpoint, calls
+        only copy the template and attach their query and body.
+        """
+        session = self.session
         target_url = urljoin(self.base_url, url)
-        user_agent = f"IPPanel/ApiClient/{self.client_version} Python/{sys.hexversion}"
-        headers = {
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-            "apikey": self.apikey,
-            "User-Agent": user_agent,
-        }
-        default_headers = requests.utils.default_headers()
-        default_headers.update(headers)
-
-        methods = {
-            'DELETE': lambda: requests.delete(target_url, headers=headers, data=json.dumps(data), params=params, timeout=self.timeout),
-            'GET': lambda: requests.get(target_url, headers=headers, params=params, timeout=self.timeout),
-            'PATCH': lambda: requests.patch(target_url, headers=headers, data=json.dumps(data), timeout=self.timeout),
-            'POST': lambda: requests.post(target_url, headers=headers, data=json.dumps(data), timeout=self.timeout),
-            'PUT': lambda: requests.put(target_url, headers=headers, data=json.dumps(data), timeout=self.timeout)
-        }
-
-        if method not in methods:
+        template = session.prepare_request(_requests().Request(method, target_url, headers=self.headers))
+        settings = session.merge_environment_settings(target_url, {}, None, None, None)
+        settings["timeout"] = self.timeouts.get(endpoint_name(url), self.timeout)
+        return template, settings
+
+    def prepare(self, method, url, data=None, params=None):
+        """
+        build prepared request of given endpoint and its send settings
+        """
+        if method not in SUPPORTED_METHODS:
             raise ValueError(str(method) + " is not in supported methods")
 
+        template, settings = self.__templates(method, url)
+        prepared = template.copy()
+        if params:
+            prepared.url = f"{prepared.url}?{urlencode(params, doseq=True)}"
+        if method != 'GET':
+            prepared.prepare_body(self.codec.dumps(data), None)
+
+        return prepared, settings
+
+    def req(self, method, url, data=None, params=None):
+        """
+        make http request with prefixed base url, given data and params
+        """
+        # requests are timed only while someone listens
+        timer = RequestTimer(method, url) if self.listeners else None
+
+        prepared, settings = self.prepare(method, url, data, params)
+        if timer is not None:
+            timer.prepared(prepared)
+
+        requests = _requests()
+        attempt = 1
         try:
-            response = methods[method]()
+            while True:
+                if self.rate_limiter is not None:
+                    wait = self.rate_limiter.reserve(method, url)
+                    if wait:
+                        time.sleep(wait)
+
+                if self.breaker is not None:
+                    self.breaker.allow(method, url)
+                    started = time.monotonic()
 
-            if response.status_code not in self.__supported_status_codes:
-                response.raise_for_status()
-        except RequestException as e:
-            raise HTTPError(e)
+                try:
+                    response = self.__send(method, url, prepared, settings, timer)
+                except requests.RequestException as e:
+                    if self.breaker is not None:
+                        self.breaker.record(method, url, time.monotonic() - started, True)
+                    delay = self.retry and self.retry.next_delay(
+                        method, attempt, connection_error=_not_sent(e))
+                    if delay is None:
+                        raise HTTPError(e)
+                except BaseException:
+                    # a probe left taken would keep the circuit half open for good
+                    if self.breaker is not None:
+                        self.breaker.release(method, url)
+                    raise
+                else:
+                    if self.breaker is not None:
+                        self.breaker.record(method, url, time.monotonic() - started, response.status_code >= 500)
+                    delay = self.retry and self.retry.next_delay(
+                        method, attempt, status=response.status_code,
+                        retry_after=parse_retry_after(response.headers.get("Retry-After")))
+                    if delay is None:
+                        break
+                    response.close()
 
-        parsed_response = Response(json.loads(response.content))
-        errors = parse_errors(parsed_response)
+                time.sleep(delay)
+                attempt += 1
 
-        if isinstance(errors, Exception):
-            raise errors
+            try:
+                if response.status_code not in self.__supported_status_codes:
+                    response.raise_for_status()
+            except requests.RequestException as e:
+                raise HTTPError(e)
 
+            if timer is None:
+                return parse_response(response.content, self.codec)
+            parsed_response = timer.parse(response.content, self.codec)
+        except Exception as e:
+            if timer is not None:
+                self.__emit(timer.event(attempt - 1, e))
+            raise
+
+        self.__emit(timer.event(attempt - 1))
         return parsed_response
 
+    def __send(self, method, url, prepared, settings, timer):
+        delay = None if self.hedge is None else self.hedge.delay(method, url)
+        # without a free hedge worker the read is sent unhedged on this thread
+        if delay is not None and self.__reserve_worker():
+            return self.__send_hedged(prepared, settings, delay, timer)
+        if timer is None:
+            return self.session.send(prepared, **settings)
+        return timer.send(self.session, prepared, settings)
+
+    def __reserve_worker(self):
+        """
+        take a free hedge worker, False when all are busy
+        """
+        with self.__hedge_lock:
+            if self.__hedge_busy >= self.__hedge_workers:
+                return False
+            self.__hedge_busy += 1
+            return True
+
+    def __free_worker(self):
+        with self.__hedge_lock:
+            self.__hedge_busy -= 1
+
+    def __submit(self, prepared, settings):
+        """
+        send prepared request on a reserved hedge worker
+        """
+        try:
+            return self.__hedge_executor().submit(self.__send_on_worker, prepared, settings)
+        except BaseException:
+            self.__free_worker()
+            raise
+
+    def __send_on_worker(self, prepared, settings):
+        try:
+            return self.session.send(prepared, **settings)
+        finally:
+            self.__free_worker()
+
+    def __send_hedged(self, prepared, settings, delay, timer):
+        """
+        send prepared request on a reserved worker and, if it is not answered
+        within delay and another worker is free, a copy of it, returning the
+        first response
+        """
+        started = time.perf_counter()
+        futures = [self.__submit(prepared, settings)]
+        if not wait(futures, timeout=delay).done and self.__reserve_worker():
+            if self.hedge.acquire():
+                futures.append(self.__submit(prepared.copy(), settings))
+            else:
+                self.__free_worker()
+
+        response = error = None
+        try:
+            for future in as_completed(futures):
+                try:
+                    response = future.result()
+                except _requests().RequestException as e:
+                    error = e
+                    continue
+                if future is not futures[0]:
+                    self.hedge.won()
+                break
+            else:
+                raise error
+        finally:
+            # the slower copy is closed whenever it finishes
+            for future in futures:
+                future.add_done_callback(partial(_close_unused, response))
+            if timer is not None:
+                timer.sent(started, response)
+        return response
+
+    def __hedge_executor(self):
+        executor = self.__executor
+        if executor is None:
+            with self.__session_lock:
+                executor = self.__executor
+                if executor is None:
+                    executor = self.__executor = ThreadPoolExecutor(
+                        max_workers=self.__hedge_workers, thread_name_prefix="ippanel-hedge")
+        return executor
+
+    def __emit(self, event):
+        for listener in self.listeners:
+            # a failing listener must not change the result of a request
+            # that was already made, like a sent message
+            try:
+                listener(event)
+            except Exception:
+                import logging
+                logging.getLogger(__name__).exception("request listener %r failed", listener)
+
     def get(self, url, params=None):
         """
         make http GET request with prefixed base url and given data
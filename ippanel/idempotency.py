@@ -0,0 +1,136 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# default number of idempotency keys remembered
+DEFAULT_MAXSIZE = 100000
+# default seconds an idempotency key is remembered for
+DEFAULT_TTL = 24 * 3600
+
+
+class _Flight:
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class IdempotencyStore:
+    """
+    bounded in memory map of idempotency key to message id.
+
+    a send with a remembered key returns the stored message id instead of
+    sending again, concurrent sends with the same key wait for the first one.
+    keys are forgotten after ttl seconds or when maxsize is exceeded, the
+    oldest first. failed sends are not remembered.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.__entries = OrderedDict()
+        self.__flights = {}
+        self.__lock = threading.Lock()
+
+    def get(self, key):
+        """
+        message id stored for key, None if it is not known
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return None
+            expires_at, message_id = entry
+            if expires_at <= time.time():
+                del self.__entries[key]
+                return None
+            return message_id
+
+    def set(self, key, message_id):
+        with self.__lock:
+            self.__entries[key] = (time.time() + self.ttl, message_id)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.maxsize:
+                self.__entries.popitem(last=False)
+
+    def run(self, key, send):
+        """
+        return message id stored for key or call send once and store its result
+        """
+        message_id = self.get(key)
+        if message_id is not None:
+            return message_id
+
+        with self.__lock:
+            flight = self.__flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.__flights[key] = _Flight()
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            # another thread may have finished between the lookup and the flight
+            flight.value = self.get(key)
+            if flight.value is None:
+                flight.value = send()
+                self.set(key, flight.value)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self.__lock:
+                del self.__flights[key]
+            flight.event.set()
+
+        return flight.value
+
+
+class SQLiteIdempotencyStore(IdempotencyStore):
+    """
+    idempotency store kept in a sqlite file, so keys survive restarts and are
+    shared by processes using the same file
+    """
+
+    def __init__(self, path, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+        super(SQLiteIdempotencyStore, self).__init__(maxsize, ttl)
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__writes = 0
+        self.__db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.__db.execute("PRAGMA journal_mode=WAL")
+        self.__db.execute(
+            "CREATE TABLE IF NOT EXISTS idempotency (key TEXT PRIMARY KEY, message_id INTEGER, expires_at REAL)")
+        self.__db.execute("CREATE INDEX IF NOT EXISTS idempotency_expires_at ON idempotency (expires_at)")
+
+    def get(self, key):
+        with self.__lock:
+            row = self.__db.execute(
+                "SELECT message_id FROM idempotency WHERE key = ? AND expires_at > ?", (key, time.time())).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, message_id):
+        now = time.time()
+        with self.__lock:
+            self.__db.execute(
+                "INSERT OR REPLACE INTO idempotency (key, message_id, expires_at) VALUES (?, ?, ?)",
+                (key, message_id, now + self.ttl))
+
+            # evict now and then instead of on every write
+            self.__writes += 1
+            if self.__writes % 1000 == 0:
+                self.__db.execute("DELETE FROM idempotency WHERE expires_at <= ?", (now,))
+                self.__db.execute(
+                    "DELETE FROM idempotency WHERE key IN "
+                    "(SELECT key FROM idempotency ORDER BY expires_at DESC LIMIT -1 OFFSET ?)", (self.maxsize,))
+
+    def close(self):
+        with self.__lock:
+            self.__db.close()
@@ -0,0 +1,137 @@
+import hashlib
+from collections import deque
+
+from ippanel.export import load_checkpoint, save_checkpoint
+
+# default number of inbox messages fetched per page by syncs
+DEFAULT_SYNC_PAGE_SIZE = 100
+# default number of message hashes remembered for deduplication
+DEFAULT_SEEN_SIZE = 10000
+
+
+def message_key(message):
+    """
+    stable hash identifying an inbox message, the api gives it no id
+    """
+    data = "\x1f".join(str(getattr(message, field)) for field in message.fields)
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def _latest(first, second):
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return max(first, second)
+
+
+class InboxSync:
+    """
+    incremental reader of inbox messages.
+
+    the inbox is read newest first until a page reaches messages older than
+    the cursor or holds nothing unseen, so a poll costs about one request
+    no matter how large the inbox is. messages at the cursor are told apart
+    by a bounded set of hashes of recently seen messages. when path is
+    given, the cursor is kept there and a restarted sync does not yield
+    messages it already yielded.
+
+    max_pages caps pages read by one poll. a poll that stops at max_pages
+    keeps the cursor and the next poll continues from the page it stopped
+    at, the cursor moves once a poll reaches it, so no message is skipped.
+    """
+
+    def __init__(self, client, path=None, page_size=DEFAULT_SYNC_PAGE_SIZE, seen_size=DEFAULT_SEEN_SIZE,
+                 max_pages=None):
+        self.client = client
+        self.path = path
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.created_at = None
+        # page a poll stopped by max_pages continues from, and newest created_at read since
+        self.resume_page = None
+        self.newest = None
+        self.__seen = deque(maxlen=seen_size)
+        self.__seen_set = set()
+
+        state = load_checkpoint(path) if path is not None else None
+        if state is not None:
+            self.created_at = state["created_at"]
+            self.resume_page = state.get("resume_page")
+            self.newest = state.get("newest")
+            self.__remember(state["seen"])
+
+    def __remember(self, keys):
+        seen = self.__seen
+        for key in keys:
+            if key in self.__seen_set:
+                continue
+            if len(seen) == seen.maxlen:
+                self.__seen_set.discard(seen[0])
+            seen.append(key)
+            self.__seen_set.add(key)
+
+    def poll(self):
+        """
+        fetch messages received since last poll, oldest first.
+
+        the cursor is saved after every poll, messages of a poll that raised
+        are fetched again by the next one.
+        """
+        messages = []
+        keys = []
+        cursor = self.created_at
+        # messages received since the last poll push unread pages later, so
+        # a resumed poll may meet pages it has seen already and goes on
+        resuming = self.resume_page is not None
+        start = page = self.resume_page or 0
+        reached = self.max_pages is None
+        while self.max_pages is None or page - start < self.max_pages:
+            items, _ = self.client.fetch_inbox(page, self.page_size)
+
+            older = False
+            new = 0
+            for message in items:
+                key = message_key(message)
+                if cursor is not None and message.created_at is not None and message.created_at < cursor:
+                    older = True
+                    continue
+                if key in self.__seen_set:
+                    continue
+                messages.append(message)
+                keys.append(key)
+                new += 1
+
+            if older or len(items) < self.page_size or not new and cursor is not None and not resuming:
+                reached = True
+                break
+            page += 1
+
+        # pages are newest first
+        messages.reverse()
+        keys.reverse()
+        self.__remember(keys)
+        newest = self.newest
+        for message in messages:
+            newest = _latest(newest, message.created_at)
+
+        previous = self.resume_page
+        if reached:
+            self.created_at = _latest(self.created_at, newest)
+            self.resume_page = self.newest = None
+        else:
+            # pages after the last one read are still newer than the cursor
+            self.resume_page = page
+            self.newest = newest
+
+        if self.path is not None and (messages or self.resume_page != previous):
+            self.save()
+        return messages
+
+    def save(self):
+        save_checkpoint(self.path, {
+            "created_at": self.created_at,
+            "resume_page": self.resume_page,
+            "newest": self.newest,
+            "seen": list(self.__seen),
+        })
@@ -0,0 +1,223 @@
+import math
+import re
+import threading
+import time
+import weakref
+from collections import namedtuple
+
+from ippanel.errors import parse_errors
+from ippanel.models import Response
+
+# smallest latency told apart by histograms, in seconds
+HISTOGRAM_MIN = 0.0001
+# relative width of histogram buckets, percentiles are off by at most this much
+HISTOGRAM_PRECISION = 0.05
+# request phases timed by events
+PHASES = ("prepare", "network", "decode", "model", "total")
+
+_ID_SEGMENT = re.compile(r"(?<=/)\d+(?=/|$)")
+
+RequestEvent = namedtuple("RequestEvent", [
+    "endpoint", "method", "status", "bytes_out", "bytes_in", "reused", "retries",
+    "prepare", "network", "decode", "model", "total", "error",
+])
+RequestEvent.__doc__ = """
+one api request as seen by HTTPClient.
+
+bytes are body sizes, reused is whether the last attempt was sent on a
+kept alive connection, None when it is not known. timings are seconds:
+prepare builds the request, network covers every attempt including dns,
+connect, tls, server time and reading the body, decode parses json and
+model builds the response. error is the exception raised to the caller.
+"""
+
+# connections that carried a request already
+_used_connections = weakref.WeakSet()
+
+
+def endpoint_name(url):
+    """
+    endpoint of a request url, numeric path segments are replaced by {id}
+    """
+    return _ID_SEGMENT.sub("{id}", "/" + url.lstrip("/"))[1:]
+
+
+class RequestTimer:
+    """
+    collects timings of one request for listeners of a client
+    """
+
+    __slots__ = ("method", "url", "started", "prepare", "network", "decode", "model", "status",
+                 "bytes_out", "bytes_in", "reused")
+
+    def __init__(self, method, url):
+        self.method = method
+        self.url = url
+        self.started = time.perf_counter()
+        self.prepare = self.network = self.decode = self.model = 0.0
+        self.status = self.reused = None
+        self.bytes_out = self.bytes_in = 0
+
+    def prepared(self, prepared):
+        self.prepare = time.perf_counter() - self.started
+        self.bytes_out = len(prepared.body or b"")
+
+    def send(self, session, prepared, settings):
+        """
+        send prepared request on session and read its body
+        """
+        started = time.perf_counter()
+        try:
+            # the body is read after the connection is known
+            response = session.send(prepared, **dict(settings, stream=True))
+            connection = getattr(response.raw, "connection", None)
+            if connection is not None:
+                self.reused = connection in _used_connections
+                _used_connections.add(connection)
+            response.content
+        except BaseException:
+            self.sent(started)
+            raise
+
+        self.sent(started, response)
+        return response
+
+    def sent(self, started, response=None):
+        """
+        record an attempt sent at started and its response if it got one
+        """
+        self.network += time.perf_counter() - started
+        if response is not None:
+            self.status = response.status_code
+            self.bytes_in = len(response.content)
+
+    def parse(self, content, codec):
+        """
+        decode and build response like parse_response, timing each step
+        """
+        started = time.perf_counter()
+        data = codec.loads(content)
+        decoded = time.perf_counter()
+        self.decode = decoded - started
+        try:
+            response = Response(data)
+            errors = parse_errors(response)
+        finally:
+            self.model = time.perf_counter() - decoded
+
+        if isinstance(errors, Exception):
+            raise errors
+        return response
+
+    def event(self, retries, error=None):
+        return RequestEvent(
+            endpoint_name(self.url), self.method, self.status, self.bytes_out, self.bytes_in, self.reused,
+            retries, self.prepare, self.network, self.decode, self.model, time.perf_counter() - self.started, error,
+        )
+
+
+class Histogram:
+    """
+    log bucketed histogram of positive values with bounded memory
+    """
+
+    def __init__(self, minimum=HISTOGRAM_MIN, precision=HISTOGRAM_PRECISION):
+        self.minimum = minimum
+        self.log_base = math.log1p(precision)
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value):
+        bucket = 0 if value <= self.minimum else int(math.log(value / self.minimum) / self.log_base) + 1
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        """
+        upper bound of the bucket holding given percentile, None when empty
+        """
+        if not self.count:
+            return None
+
+        rank = math.ceil(self.count * percent / 100)
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(self.max, self.minimum * math.exp(bucket * self.log_base))
+        return self.max
+
+
+class LatencyHistograms:
+    """
+    request listener keeping latency histograms per endpoint and phase.
+
+    add an instance as listener of a client and read percentiles of its
+    requests with percentile or snapshot.
+    """
+
+    def __init__(self, percentiles=(50, 95, 99)):
+        self.percentiles = percentiles
+        self.started = time.monotonic()
+        self.__histograms = {}
+        self.__errors = {}
+        self.__lock = threading.Lock()
+
+    def __call__(self, event):
+        key = (event.method, event.endpoint)
+        with self.__lock:
+            histograms = self.__histograms.get(key)
+            if histograms is None:
+                histograms = self.__histograms[key] = {phase: Histogram() for phase in PHASES}
+            for phase, histogram in histograms.items():
+                histogram.record(getattr(event, phase))
+            if event.error is not None:
+                self.__errors[key] = self.__errors.get(key, 0) + 1
+
+    def percentile(self, endpoint, percent, phase="total", method=None, min_count=1):
+        """
+        latency percentile of an endpoint in seconds, None before its
+        first min_count requests
+        """
+        with self.__lock:
+            for (key_method, key_endpoint), histograms in self.__histograms.items():
+                if key_endpoint == endpoint and (method is None or key_method == method):
+                    histogram = histograms[phase]
+                    return histogram.percentile(percent) if histogram.count >= min_count else None
+        return None
+
+    def snapshot(self):
+        """
+        count, errors, throughput and latency percentiles per endpoint
+        """
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        result = {}
+        with self.__lock:
+            for (method, endpoint), histograms in self.__histograms.items():
+                total = histograms["total"]
+                stats = {
+                    "count": total.count,
+                    "errors": self.__errors.get((method, endpoint), 0),
+                    "rate": total.count / elapsed,
+                    "mean": total.total / total.count,
+                    "max": total.max,
+                }
+                for percent in self.percentiles:
+                    stats[f"p{percent}"] = total.percentile(percent)
+                stats["phases"] = {
+                    phase: {f"p{percent}": histogram.percentile(percent) for percent in self.percentiles}
+                    for phase, histogram in histograms.items() if phase != "total"
+                }
+                result[f"{method} {endpoint}"] = stats
+        return result
+
+    def reset(self):
+        with self.__lock:
+            self.__histograms.clear()
+            self.__errors.clear()
+            self.started = time.monotonic()
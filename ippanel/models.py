@@ -1,17 +1,156 @@
+from collections import namedtuple
+
+# result formats of list endpoints: model objects, named tuples or columns
+RESULT_FORMATS = ("object", "tuple", "columns")
+
+
+class Columns(object):
+    """
+    column oriented rows of a model, one list per field
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.columns = {name: [] for name in model.fields}
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __len__(self):
+        return len(self.columns[self.model.fields[0]])
+
+    def __iter__(self):
+        return self.rows()
+
+    def extend_json(self, items):
+        """
+        append a list of json objects
+        """
+        for name, key in zip(self.model.fields, self.model.json_keys):
+            self.columns[name].extend([data.get(key) for data in items])
+
+    def extend(self, other):
+        """
+        append rows of other columns of the same model
+        """
+        for name, column in self.columns.items():
+            column.extend(other.columns[name])
+
+    def rows(self):
+        """
+        iterate rows as named tuples
+        """
+        return map(self.model.Row._make, zip(*self.columns.values()))
+
+    def copy(self):
+        """
+        columns of the same rows whose lists may be changed independently
+        """
+        copy = Columns(self.model)
+        copy.columns = {name: list(column) for name, column in self.columns.items()}
+        return copy
+
+    def to_dict(self):
+        return self.columns
+
+    def __repr__(self):
+        return str(self.columns)
+
+
 class Base(object):
     """
-    base model 
+    base model, fields are declared in __slots__ of subclasses
     """
 
+    __slots__ = ()
+
+    # json keys stored under another field name
+    renames = {"from": "sender"}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        # every field of the class, including the inherited ones
+        cls.fields = tuple(name for klass in reversed(cls.__mro__) for name in klass.__dict__.get("__slots__", ()))
+        # json key to field name map, built once per class
+        cls.keymap = {name: name for name in cls.fields}
+        for key, name in cls.renames.items():
+            if name in cls.keymap:
+                cls.keymap[key] = name
+        cls.defaults = dict.fromkeys(cls.fields)
+        # json key read for each field by tuple and column results
+        json_keys = {name: key for key, name in cls.renames.items()}
+        cls.json_keys = tuple(json_keys.get(name, name) for name in cls.fields)
+        cls.Row = namedtuple(f"{cls.__name__}Row", cls.fields)
+
+    def __init__(self, data={}):
+        for name in self.fields:
+            setattr(self, name, None)
+
+        self.from_json(data)
+
     def from_json(self, data={}):
-        for name, value in data.items():
-            if name == 'from':
-                name = 'sender'
-            if hasattr(self, name) and not callable(getattr(self, name)):
+        keymap = self.keymap
+        for key, value in data.items():
+            name = keymap.get(key)
+            if name is not None:
                 setattr(self, name, value)
 
+    @classmethod
+    def from_list(cls, items):
+        """
+        build a list of models from a list of json objects in one pass
+        """
+        new = cls.__new__
+        keymap = cls.keymap
+        defaults = cls.defaults.items()
+        models = []
+        for data in items:
+            model = new(cls)
+            for name, value in defaults:
+                setattr(model, name, value)
+            for key, value in data.items():
+                name = keymap.get(key)
+                if name is not None:
+                    setattr(model, name, value)
+            models.append(model)
+
+        return models
+
+    @classmethod
+    def rows_from_list(cls, items):
+        """
+        build a list of named tuples from a list of json objects
+        """
+        make = cls.Row._make
+        keys = cls.json_keys
+        return [make(map(data.get, keys)) for data in items]
+
+    @classmethod
+    def columns_from_list(cls, items, columns=None):
+        """
+        append a list of json objects to columns, new columns are made if not given
+        """
+        if columns is None:
+            columns = Columns(cls)
+        columns.extend_json(items)
+        return columns
+
+    @classmethod
+    def build(cls, items, result_format="object"):
+        """
+        build a list of json objects in one of RESULT_FORMATS
+        """
+        if result_format == "object":
+            return cls.from_list(items)
+        if result_format == "tuple":
+            return cls.rows_from_list(items)
+        if result_format == "columns":
+            return cls.columns_from_list(items)
+        raise ValueError(f"result format must be one of {RESULT_FORMATS}")
+
     def __repr__(self):
-        return str(self.__dict__)
+        return str({name: getattr(self, name) for name in self.fields})
 
 
 class PaginationInfo(Base):
@@ -19,15 +158,7 @@ class PaginationInfo(Base):
     response pagination info template
     """
 
-    def __init__(self, data):
-        self.total = None
-        self.limit = None
-        self.page = None
-        self.pages = None
-        self.prev = None
-        self.next = None
-
-        super(PaginationInfo, self).from_json(data)
+    __slots__ = ("total", "limit", "page", "pages", "prev", "next")
 
 
 class Response(Base):
@@ -35,14 +166,10 @@ class Response(Base):
     api response template
     """
 
-    def __init__(self, data):
-        self.status = None
-        self.code = None
-        self.data = None
-        self.meta = None
-        self.error_message = None
+    __slots__ = ("status", "code", "data", "meta", "error_message")
 
-        super(Response, self).from_json(data)
+    def __init__(self, data):
+        super(Response, self).__init__(data)
 
         if "meta" in data:
             self.meta = PaginationInfo(data["meta"])
@@ -53,23 +180,10 @@ class Message(Base):
     message object template
     """
 
-    def __init__(self, data):
-        self.message_id = None
-        self.number = None
-        self.message = None
-        self.state = None
-        self.type = None
-        self.valid = None
-        self.time = None
-        self.time_send = None
-        self.recipient_count = None
-        self.exit_count = None
-        self.part = None
-        self.cost = None
-        self.return_cost = None
-        self.summary = None
-
-        super(Message, self).from_json(data)
+    __slots__ = (
+        "message_id", "number", "message", "state", "type", "valid", "time", "time_send",
+        "recipient_count", "exit_count", "part", "cost", "return_cost", "summary",
+    )
 
 
 class Recipient(Base):
@@ -77,11 +191,7 @@ class Recipient(Base):
     message recipient object template
     """
 
-    def __init__(self, data):
-        self.recipient = None
-        self.status = None
-
-        super(Recipient, self).from_json(data)
+    __slots__ = ("recipient", "status")
 
 
 class InboxMessage(Base):
@@ -89,14 +199,7 @@ class InboxMessage(Base):
     inbox message template
     """
 
-    def __init__(self, data):
-        self.to = None
-        self.message = None
-        self.sender = None
-        self.created_at = None
-        self.type = None
-
-        super(InboxMessage, self).from_json(data)
+    __slots__ = ("to", "message", "sender", "created_at", "type")
 
 
 class Pattern(Base):
@@ -104,10 +207,4 @@ class Pattern(Base):
     pattern template
     """
 
-    def __init__(self, data):
-        self.code = None
-        self.status = None
-        self.message = None
-        self.is_shared = None
-
-        super(Pattern, self).from_json(data)
+    __slots__ = ("code", "status", "message", "is_shared")
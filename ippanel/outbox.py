@@ -0,0 +1,207 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from ippanel.bulk import DEFAULT_CONCURRENCY, imap_unordered
+from ippanel.codec import get_codec
+from ippanel.errors import HTTPError
+
+# default number of messages claimed from outbox at once
+DEFAULT_BATCH_SIZE = 100
+# default seconds after which a claimed message whose sender died is claimed again
+DEFAULT_LEASE = 300
+# default number of times a message is tried on network errors
+DEFAULT_MAX_ATTEMPTS = 3
+# default seconds before a message failed on network is tried again, doubled every attempt
+DEFAULT_RETRY_DELAY = 5
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+
+SEND = "send"
+PATTERN = "pattern"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    claimed_at REAL,
+    retry_at REAL,
+    message_id INTEGER,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_state ON outbox (state, id);
+"""
+
+
+class Outbox:
+    """
+    durable local queue of sends stored in sqlite.
+
+    messages are written to disk before they are sent and their message id
+    is recorded after, so a restarted process continues where it stopped.
+    a message is claimed for a lease before it is sent, messages of a
+    process that died while sending are claimed again after the lease ends.
+    a message failed on network waits retry_delay seconds, doubled on every
+    attempt, before it is claimed again.
+    """
+
+    def __init__(self, path, lease=DEFAULT_LEASE, max_attempts=DEFAULT_MAX_ATTEMPTS, codec=None,
+                 retry_delay=DEFAULT_RETRY_DELAY):
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.codec = get_codec(codec)
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.__db.execute("PRAGMA journal_mode=WAL")
+        self.__db.execute("PRAGMA synchronous=NORMAL")
+        self.__db.executescript(_SCHEMA)
+        # outboxes created before retry_at was added
+        columns = {row[1] for row in self.__db.execute("PRAGMA table_info(outbox)")}
+        if "retry_at" not in columns:
+            self.__db.execute("ALTER TABLE outbox ADD COLUMN retry_at REAL")
+
+    def close(self):
+        with self.__lock:
+            self.__db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @contextmanager
+    def __transaction(self):
+        with self.__lock:
+            db = self.__db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    def enqueue_send(self, sender, recipients, message, summary):
+        r"""Queue a message to many recipients
+
+        :return: :class:`int <int>` outbox id of the message
+        :rtype: int
+        """
+        return self.enqueue([(SEND, [sender, list(recipients), message, summary])])[0]
+
+    def enqueue_pattern(self, pattern_code, sender, recipient, values={}):
+        r"""Queue a pattern message
+
+        :return: :class:`int <int>` outbox id of the message
+        :rtype: int
+        """
+        return self.enqueue([(PATTERN, [pattern_code, sender, recipient, values])])[0]
+
+    def enqueue(self, items):
+        """
+        queue many (kind, args) items in one transaction, kind is "send" with
+        args of Client.send or "pattern" with args of Client.send_pattern.
+        returns outbox ids of items.
+        """
+        dumps = self.codec.dumps
+        rows = [(kind, dumps(args)) for kind, args in items]
+        with self.__transaction() as db:
+            return [db.execute("INSERT INTO outbox (kind, payload) VALUES (?, ?)", row).lastrowid for row in rows]
+
+    def claim(self, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        take up to batch_size pending messages due for sending, and messages
+        with an expired lease. returns (id, kind, args, attempts) items.
+        """
+        now = time.time()
+        with self.__transaction() as db:
+            rows = db.execute(
+                "SELECT id, kind, payload, attempts + 1 FROM outbox "
+                "WHERE (state = ? AND (retry_at IS NULL OR retry_at <= ?)) OR (state = ? AND claimed_at < ?) "
+                "ORDER BY id LIMIT ?",
+                (PENDING, now, SENDING, now - self.lease, batch_size),
+            ).fetchall()
+            db.executemany(
+                "UPDATE outbox SET state = ?, claimed_at = ?, attempts = attempts + 1 WHERE id = ?",
+                [(SENDING, now, row[0]) for row in rows],
+            )
+
+        loads = self.codec.loads
+        return [(outbox_id, kind, loads(payload), attempts) for outbox_id, kind, payload, attempts in rows]
+
+    def drain(self, client, batch_size=DEFAULT_BATCH_SIZE, concurrency=DEFAULT_CONCURRENCY):
+        """
+        send queued messages with client until outbox has nothing to claim.
+
+        messages rejected by api are marked failed, messages that failed on
+        network are queued again until max_attempts and are sent by a later
+        drain once their retry delay passed. returns number of messages
+        drained by their final state: sent, failed or pending.
+
+        when client has an idempotency store, every message is sent with a
+        key of its outbox id, so a message whose result was lost in a crash
+        is not sent again if the store remembers it.
+        """
+        key_prefix = f"outbox:{os.path.abspath(self.path)}:"
+        use_keys = getattr(client, "idempotency", None) is not None
+
+        def send(item):
+            outbox_id, kind, args, _ = item
+            # clients without a store may not take idempotency_key at all
+            kwargs = {"idempotency_key": key_prefix + str(outbox_id)} if use_keys else {}
+            if kind == SEND:
+                return client.send(*args, **kwargs)
+            return client.send_pattern(*args, **kwargs)
+
+        # last state of every drained message, a message requeued and sent
+        # again in the same drain is counted once
+        states = {}
+        while True:
+            batch = self.claim(batch_size)
+            if not batch:
+                counts = {SENT: 0, FAILED: 0, PENDING: 0}
+                for state in states.values():
+                    counts[state] += 1
+                return counts
+
+            # every result is written as soon as it arrives, so a crash
+            # can only lose results of sends still in flight
+            for (outbox_id, _, _, attempts), message_id, error in imap_unordered(send, batch, concurrency):
+                if error is None:
+                    update = (SENT, message_id, None, None, outbox_id)
+                elif isinstance(error, HTTPError) and attempts < self.max_attempts:
+                    retry_at = time.time() + self.retry_delay * 2 ** (attempts - 1)
+                    update = (PENDING, None, str(error), retry_at, outbox_id)
+                else:
+                    update = (FAILED, None, str(error), None, outbox_id)
+
+                with self.__transaction() as db:
+                    db.execute(
+                        "UPDATE outbox SET state = ?, message_id = ?, error = ?, retry_at = ? WHERE id = ?", update)
+                states[outbox_id] = update[0]
+
+    def get(self, outbox_id):
+        """
+        state, message id and error of a queued message
+        """
+        with self.__lock:
+            return self.__db.execute(
+                "SELECT state, message_id, error FROM outbox WHERE id = ?", (outbox_id,)).fetchone()
+
+    def counts(self):
+        """
+        number of messages by state
+        """
+        with self.__lock:
+            return dict(self.__db.execute("SELECT state, COUNT(*) FROM outbox GROUP BY state").fetchall())
@@ -0,0 +1,99 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# default number of items requested per page by iterators
+DEFAULT_PAGE_SIZE = 100
+# default number of pages fetched ahead of the one being consumed
+DEFAULT_PREFETCH = 1
+
+
+def has_next(page, meta):
+    """
+    check pagination info for a page after the given one
+    """
+    pages = getattr(meta, "pages", None)
+    if pages is not None:
+        return page + 1 < pages
+    return bool(getattr(meta, "next", None))
+
+
+def pages_ahead(page, meta, next_page, prefetch):
+    """
+    pages known to exist that may be fetched ahead while page is consumed
+    """
+    pages = getattr(meta, "pages", None)
+    if pages is None:
+        # without a page count only the next page is known to exist
+        pages = page + 2 if has_next(page, meta) else page + 1
+    return range(next_page, min(pages, page + 1 + prefetch))
+
+
+def iter_pages(fetch, page_size=DEFAULT_PAGE_SIZE, start_page=0, prefetch=DEFAULT_PREFETCH):
+    """
+    yield (page, items, meta) for every page starting from start_page.
+
+    fetch(page, limit) returns (items, meta) of a page. up to prefetch pages
+    are fetched in background threads while the current page is consumed,
+    iteration stops when meta tells there is no next page.
+    """
+    executor = ThreadPoolExecutor(max_workers=prefetch) if prefetch > 0 else None
+    futures = deque()
+    try:
+        page = start_page
+        items, meta = fetch(page, page_size)
+        next_page = page + 1
+        while True:
+            if executor is not None:
+                for ahead in pages_ahead(page, meta, next_page, prefetch):
+                    futures.append(executor.submit(fetch, ahead, page_size))
+                    next_page = ahead + 1
+
+            yield page, items, meta
+
+            if futures:
+                items, meta = futures.popleft().result()
+            elif has_next(page, meta):
+                items, meta = fetch(page + 1, page_size)
+                next_page = page + 2
+            else:
+                return
+            page += 1
+    finally:
+        if executor is not None:
+            # pages fetched ahead that were not started are not needed anymore
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+
+async def aiter_pages(fetch, page_size=DEFAULT_PAGE_SIZE, start_page=0, prefetch=DEFAULT_PREFETCH):
+    """
+    async version of iter_pages, fetch is a coroutine function and pages
+    ahead are fetched in background tasks
+    """
+    # asyncio is imported by async callers only, it is slow to import
+    import asyncio
+
+    tasks = deque()
+    try:
+        page = start_page
+        items, meta = await fetch(page, page_size)
+        next_page = page + 1
+        while True:
+            for ahead in pages_ahead(page, meta, next_page, prefetch):
+                tasks.append(asyncio.ensure_future(fetch(ahead, page_size)))
+                next_page = ahead + 1
+
+            yield page, items, meta
+
+            if tasks:
+                items, meta = await tasks.popleft()
+            elif has_next(page, meta):
+                items, meta = await fetch(page + 1, page_size)
+                next_page = page + 2
+            else:
+                return
+            page += 1
+    finally:
+        for task in tasks:
+            task.cancel()
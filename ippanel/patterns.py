@@ -0,0 +1,156 @@
+import json
+import os
+import re
+import threading
+
+from ippanel.errors import Error, ResponseCode
+from ippanel.segments import Template
+
+_INTEGER = re.compile(r"-?\d+")
+
+
+def _string(value):
+    if isinstance(value, (dict, list, tuple, set)) or value is None:
+        raise ValueError("must be a string")
+    return str(value)
+
+
+def _integer(value):
+    if isinstance(value, bool) or not isinstance(value, (int, str)) or _INTEGER.fullmatch(str(value)) is None:
+        raise ValueError("must be an integer")
+    return value
+
+
+# value checks of pattern variable types, each returns the value to send
+# or raises ValueError, values of other types are sent as they are
+COERCERS = {
+    "string": _string,
+    "integer": _integer,
+}
+
+
+class PatternSchema:
+    """
+    variables of a pattern compiled for validating values before sending
+    """
+
+    def __init__(self, code, pattern, variables, delimiter="%"):
+        self.code = code
+        self.pattern = pattern
+        self.variables = dict(variables)
+        self.delimiter = delimiter
+        self.template = Template(pattern, delimiter)
+        undeclared = [name for name in self.template.variables if name not in self.variables]
+        if undeclared:
+            raise ValueError(f"variables {', '.join(undeclared)} of pattern are not declared")
+        self.coercers = {name: COERCERS.get(type) for name, type in self.variables.items()}
+
+    def validate(self, values):
+        """
+        check and coerce values of pattern variables.
+
+        raises :class:`Error <Error>` with unprocessable entity code and a
+        list of messages per field, like the api does.
+        """
+        errors = {}
+        coerced = {}
+        for name, coercer in self.coercers.items():
+            if name not in values:
+                errors[name] = [f"{name} is required"]
+                continue
+            try:
+                coerced[name] = values[name] if coercer is None else coercer(values[name])
+            except ValueError as e:
+                errors[name] = [f"{name} {e}"]
+
+        for name in values:
+            if name not in self.coercers:
+                errors[name] = [f"{name} is not a variable of pattern"]
+
+        if errors:
+            raise Error(ResponseCode.ErrUnprocessableEntity.value, errors)
+        return coerced
+
+    def render(self, values):
+        """
+        render pattern text with values
+        """
+        return self.template.render(values)
+
+    def to_json(self):
+        return {
+            "code": self.code,
+            "pattern": self.pattern,
+            "variables": self.variables,
+            "delimiter": self.delimiter,
+        }
+
+
+class PatternRegistry:
+    """
+    local registry of pattern schemas by pattern code
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.__schemas = {}
+        self.__lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def __contains__(self, code):
+        return code in self.__schemas
+
+    def __len__(self):
+        return len(self.__schemas)
+
+    def get(self, code):
+        return self.__schemas.get(code)
+
+    def register(self, code, pattern, variables, delimiter="%"):
+        """
+        add a pattern schema, saved to registry path if it has one
+        """
+        return self.add(PatternSchema(code, pattern, variables, delimiter))
+
+    def add(self, schema):
+        """
+        add a built pattern schema, saved to registry path if it has one
+        """
+        with self.__lock:
+            self.__schemas[schema.code] = schema
+        if self.path is not None:
+            self.save(self.path)
+        return schema
+
+    def validate(self, code, values):
+        """
+        check values of a registered pattern, values of unknown patterns are
+        returned as they are
+        """
+        schema = self.__schemas.get(code)
+        if schema is None:
+            return values
+        return schema.validate(values)
+
+    def save(self, path):
+        """
+        write schemas to a json file
+        """
+        with self.__lock:
+            data = [schema.to_json() for schema in self.__schemas.values()]
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+
+    def load(self, path):
+        """
+        read schemas from a json file written by save
+        """
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        schemas = {item["code"]: PatternSchema(**item) for item in data}
+        with self.__lock:
+            self.__schemas.update(schemas)
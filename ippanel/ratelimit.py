@@ -0,0 +1,150 @@
+import os
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# endpoint classes rate limits are kept for
+SEND = "send"
+READ = "read"
+
+_STATE = struct.Struct("<dd")
+
+
+def endpoint_class(method, url):
+    """
+    rate limit class of a request, every POST sends or creates something
+    """
+    return SEND if method == "POST" else READ
+
+
+def _take(tokens, updated_at, now, rate, capacity, count):
+    """
+    refill a bucket up to now and take count tokens from it.
+
+    tokens may go below zero, callers then wait until their share is refilled,
+    which keeps concurrent callers in arrival order.
+    """
+    tokens = min(capacity, tokens + (now - updated_at) * rate) - count
+    wait = -tokens / rate if tokens < 0 else 0.0
+    return tokens, wait
+
+
+class TokenBucket:
+    """
+    in process token bucket shared by threads
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.__tokens = self.capacity
+        self.__updated_at = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def reserve(self, count=1):
+        """
+        take count tokens and return seconds to wait before using them
+        """
+        with self.__lock:
+            now = time.monotonic()
+            self.__tokens, wait = _take(self.__tokens, self.__updated_at, now, self.rate, self.capacity, count)
+            self.__updated_at = now
+        return wait
+
+    def acquire(self, count=1):
+        """
+        block until count tokens are available
+        """
+        wait = self.reserve(count)
+        if wait:
+            time.sleep(wait)
+
+
+class FileTokenBucket:
+    """
+    token bucket stored in a file and shared by every process on the host
+    using it, access is serialized with an exclusive file lock
+    """
+
+    def __init__(self, path, rate, capacity=None):
+        if fcntl is None:
+            raise RuntimeError("file token bucket needs fcntl, it is not available on this platform")
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.path = path
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.__lock = threading.Lock()
+        self.__fd = None
+        self.__pid = None
+
+    def __open(self):
+        # a descriptor inherited from a parent process shares its lock,
+        # so every process opens the file itself
+        if self.__pid != os.getpid():
+            self.__fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self.__pid = os.getpid()
+        return self.__fd
+
+    def reserve(self, count=1):
+        """
+        take count tokens and return seconds to wait before using them
+        """
+        with self.__lock:
+            fd = self.__open()
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                now = time.time()
+                state = os.pread(fd, _STATE.size, 0)
+                if len(state) == _STATE.size:
+                    tokens, updated_at = _STATE.unpack(state)
+                else:
+                    tokens, updated_at = self.capacity, now
+
+                tokens, wait = _take(tokens, updated_at, now, self.rate, self.capacity, count)
+                os.pwrite(fd, _STATE.pack(tokens, now), 0)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        return wait
+
+    def acquire(self, count=1):
+        """
+        block until count tokens are available
+        """
+        wait = self.reserve(count)
+        if wait:
+            time.sleep(wait)
+
+    def close(self):
+        with self.__lock:
+            if self.__pid == os.getpid():
+                os.close(self.__fd)
+            self.__fd = self.__pid = None
+
+
+class RateLimiter:
+    """
+    rate limiter keeping a bucket per endpoint class, a class without a
+    bucket is not limited
+    """
+
+    def __init__(self, send=None, read=None):
+        self.buckets = {SEND: send, READ: read}
+
+    def reserve(self, method, url):
+        """
+        take a token for the request and return seconds to wait before sending it
+        """
+        bucket = self.buckets.get(endpoint_class(method, url))
+        if bucket is None:
+            return 0.0
+        return bucket.reserve()
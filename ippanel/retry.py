@@ -0,0 +1,114 @@
+import random
+import threading
+import time
+
+# methods that may be sent again without side effects
+IDEMPOTENT_METHODS = ("GET", "PUT", "DELETE")
+# status codes worth retrying for idempotent requests
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# status codes telling the request was rejected before being processed,
+# so even non idempotent requests may be retried
+REJECTED_STATUS_CODES = (429,)
+
+
+def parse_retry_after(value):
+    """
+    seconds to wait from a Retry-After header, given in seconds or as http date
+    """
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    # email is slow to import and http dates are rare
+    from email.utils import parsedate_to_datetime
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    retry policy with exponential backoff and jitter.
+
+    idempotent requests are retried on connection errors, timeouts and on
+    RETRY_STATUS_CODES. other requests (e.g. sends with POST) are only retried
+    when they never reached the server: failures opening a connection,
+    connect timeouts and 429. a connection dropped after the request was
+    written is not retried for them.
+    """
+
+    def __init__(self, max_attempts=3, backoff_factor=0.5, max_backoff=30, jitter=True,
+                 retry_status_codes=RETRY_STATUS_CODES, respect_retry_after=True):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+
+        self.max_attempts = max_attempts
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_status_codes = retry_status_codes
+        self.respect_retry_after = respect_retry_after
+        self.__lock = threading.Lock()
+        self.__stats = {"retries": 0, "status_retries": 0, "connection_retries": 0, "exhausted": 0}
+
+    @property
+    def stats(self):
+        """
+        snapshot of retry counters
+        """
+        with self.__lock:
+            return dict(self.__stats)
+
+    def backoff(self, attempt):
+        """
+        seconds to wait after the given failed attempt (starting from 1)
+        """
+        delay = min(self.max_backoff, self.backoff_factor * (2 ** (attempt - 1)))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def is_retryable(self, method, status=None, connection_error=False):
+        """
+        check that a failed request may be sent again
+        """
+        if method in IDEMPOTENT_METHODS:
+            return status is None or status in self.retry_status_codes
+
+        if status is None:
+            return connection_error
+        return status in REJECTED_STATUS_CODES and status in self.retry_status_codes
+
+    def next_delay(self, method, attempt, status=None, connection_error=False, retry_after=None):
+        """
+        seconds to wait before retrying a failed attempt, None when the
+        request must not be retried.
+
+        status is None when no response was received, connection_error tells
+        the request did not reach the server.
+        """
+        if not self.is_retryable(method, status, connection_error):
+            return None
+
+        delay = self.backoff(attempt)
+        if self.respect_retry_after and retry_after is not None:
+            if retry_after > self.max_backoff:
+                delay = None
+            else:
+                delay = max(delay, retry_after)
+
+        with self.__lock:
+            if delay is None or attempt >= self.max_attempts:
+                self.__stats["exhausted"] += 1
+                return None
+
+            self.__stats["retries"] += 1
+            self.__stats["connection_retries" if status is None else "status_retries"] += 1
+
+        return delay
@@ -0,0 +1,134 @@
+import re
+from collections import namedtuple
+
+# characters of gsm 03.38 default alphabet, one septet each
+GSM_BASIC = (
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+# characters of gsm 03.38 extension table, sent as escape + character
+GSM_EXTENDED = "\f^{}\\[~]|€"
+
+GSM7 = "gsm7"
+UCS2 = "ucs2"
+
+# characters per part of single and concatenated messages by encoding
+PART_SIZES = {
+    GSM7: (160, 153),
+    UCS2: (70, 67),
+}
+
+_NOT_GSM = re.compile("[^" + re.escape(GSM_BASIC + GSM_EXTENDED) + "]")
+_EXTENDED = re.compile("[" + re.escape(GSM_EXTENDED) + "]")
+
+Segments = namedtuple("Segments", ["encoding", "length", "parts"])
+Segments.__doc__ = """
+sms encoding of a text, its length in encoding units and number of parts
+"""
+
+
+def encoding(text):
+    """
+    encoding a text is sent with, gsm7 when all characters fit gsm alphabet
+    """
+    return UCS2 if _NOT_GSM.search(text) else GSM7
+
+
+def _parts(length, single, multi):
+    if length <= single:
+        return 1
+    return -(-length // multi)
+
+
+def segments(text):
+    """
+    encoding, length and number of parts of a text
+    """
+    if _NOT_GSM.search(text) is None:
+        length = len(text) + len(_EXTENDED.findall(text))
+        return Segments(GSM7, length, _parts(length, *PART_SIZES[GSM7]))
+
+    # characters out of basic multilingual plane take two utf-16 units
+    length = len(text)
+    if max(text) > "\uffff":
+        length = len(text.encode("utf-16-le")) // 2
+    return Segments(UCS2, length, _parts(length, *PART_SIZES[UCS2]))
+
+
+def count_parts(text):
+    """
+    number of sms parts a text is sent in
+    """
+    return segments(text).parts
+
+
+def count_parts_many(texts):
+    """
+    number of sms parts of every text in a batch
+    """
+    gsm_single, gsm_multi = PART_SIZES[GSM7]
+    ucs_single, ucs_multi = PART_SIZES[UCS2]
+    not_gsm = _NOT_GSM.search
+    extended = _EXTENDED.findall
+
+    parts = []
+    for text in texts:
+        if not_gsm(text) is None:
+            length = len(text) + len(extended(text))
+            single, multi = gsm_single, gsm_multi
+        else:
+            length = len(text)
+            if max(text) > "\uffff":
+                length = len(text.encode("utf-16-le")) // 2
+            single, multi = ucs_single, ucs_multi
+        parts.append(1 if length <= single else -(-length // multi))
+
+    return parts
+
+
+def estimate_cost(texts, price_per_part):
+    """
+    total parts and cost of sending every text of a batch once
+    """
+    parts = sum(count_parts_many(texts))
+    return parts, parts * price_per_part
+
+
+class Template:
+    """
+    pattern template compiled once and rendered against many value sets,
+    variables are written as %name% with the given delimiter
+    """
+
+    def __init__(self, pattern, delimiter="%"):
+        self.pattern = pattern
+        self.delimiter = delimiter
+        expression = re.compile(re.escape(delimiter) + r"(\w+)" + re.escape(delimiter))
+        # static text pieces and variable names alternate
+        self.pieces = expression.split(pattern)
+        self.variables = tuple(dict.fromkeys(self.pieces[1::2]))
+
+    def render(self, values):
+        """
+        render pattern with values of its variables
+        """
+        pieces = self.pieces[:]
+        try:
+            for index in range(1, len(pieces), 2):
+                pieces[index] = str(values[pieces[index]])
+        except KeyError as e:
+            raise ValueError(f"missing value of pattern variable {e.args[0]}")
+        return "".join(pieces)
+
+    def render_many(self, values_batch):
+        """
+        render pattern with each set of values lazily
+        """
+        for values in values_batch:
+            yield self.render(values)
+
+    def estimate_cost(self, values_batch, price_per_part):
+        """
+        total parts and cost of sending pattern once with each set of values
+        """
+        return estimate_cost(self.render_many(values_batch), price_per_part)
@@ -0,0 +1,195 @@
+import http.client
+import selectors
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from urllib.parse import urlencode, urljoin, urlsplit
+
+from ippanel.codec import get_codec
+from ippanel.errors import HTTPError
+from ippanel.httpclient import (
+    DEFAULT_POOL_MAXSIZE,
+    SUPPORTED_METHODS,
+    SUPPORTED_STATUS_CODES,
+    TEMPLATE_CACHE_SIZE,
+    build_headers,
+    parse_response,
+)
+from ippanel.retry import parse_retry_after
+
+
+class _ConnectError(Exception):
+    """
+    connection to api could not be opened, so the request was not sent
+    """
+
+
+def _dropped(connection):
+    """
+    check whether an idle kept alive connection was closed by the server
+    """
+    sock = connection.sock
+    if sock is None:
+        return True
+    # an idle connection is readable only when the server closed it,
+    # select.select fails on descriptors above FD_SETSIZE
+    with selectors.DefaultSelector() as selector:
+        selector.register(sock, selectors.EVENT_READ)
+        return bool(selector.select(0))
+
+
+class StdlibHTTPClient:
+    """
+    http client built on http.client of standard library only.
+
+    it has no dependency to import, which matters to short lived processes
+    making a few requests. up to pool_maxsize keep-alive connections are
+    kept for reuse and it may be shared by threads. proxies and
+    environment settings are not read.
+    """
+
+    def __init__(self, apikey, base_url, timeout, client_version="1.0.0", pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 retry=None, rate_limiter=None, codec=None):
+        split = urlsplit(base_url)
+        if split.scheme not in ("http", "https"):
+            raise ValueError(f"unsupported scheme of base url {base_url}")
+
+        self.apikey = apikey
+        self.timeout = timeout
+        self.base_url = base_url
+        self.client_version = client_version
+        self.pool_maxsize = pool_maxsize
+        self.retry = retry
+        self.rate_limiter = rate_limiter
+        self.codec = get_codec(codec)
+        self.headers = build_headers(apikey, client_version)
+        self.__scheme = split.scheme
+        self.__host = split.hostname
+        self.__port = split.port
+        self.__supported_status_codes = SUPPORTED_STATUS_CODES
+        self.__paths = lru_cache(maxsize=TEMPLATE_CACHE_SIZE)(self.__path)
+        self.__idle = deque()
+        self.__lock = threading.Lock()
+
+    def __path(self, url):
+        split = urlsplit(urljoin(self.base_url, url))
+        return split.path + (f"?{split.query}" if split.query else "")
+
+    def __connect(self):
+        if self.__scheme == "https":
+            return http.client.HTTPSConnection(self.__host, self.__port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.__host, self.__port, timeout=self.timeout)
+
+    def __acquire(self):
+        """
+        idle connection still open or a new one
+        """
+        while True:
+            with self.__lock:
+                connection = self.__idle.pop() if self.__idle else None
+            if connection is None:
+                return self.__connect()
+            if not _dropped(connection):
+                return connection
+            connection.close()
+
+    def __release(self, connection):
+        with self.__lock:
+            if len(self.__idle) < self.pool_maxsize:
+                self.__idle.append(connection)
+                return
+        connection.close()
+
+    def close(self):
+        """
+        close idle connections
+        """
+        with self.__lock:
+            idle, self.__idle = self.__idle, deque()
+        for connection in idle:
+            connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __send(self, method, path, body):
+        """
+        send a request and read its response, returns (status, reason, retry after, content)
+        """
+        connection = self.__acquire()
+        try:
+            if connection.sock is None:
+                try:
+                    connection.connect()
+                except OSError as e:
+                    raise _ConnectError() from e
+            connection.request(method, path, body=body, headers=self.headers)
+            response = connection.getresponse()
+            content = response.read()
+        except BaseException:
+            connection.close()
+            raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            self.__release(connection)
+        return response.status, response.reason, response.getheader("Retry-After"), content
+
+    def req(self, method, url, data=None, params=None):
+        """
+        make http request with prefixed base url, given data and params
+        """
+        if method not in SUPPORTED_METHODS:
+            raise ValueError(str(method) + " is not in supported methods")
+
+        path = self.__paths(url)
+        if params:
+            path = f"{path}{'&' if '?' in path else '?'}{urlencode(params, doseq=True)}"
+        body = None if method == 'GET' else self.codec.dumps(data)
+
+        attempt = 1
+        while True:
+            if self.rate_limiter is not None:
+                wait = self.rate_limiter.reserve(method, url)
+                if wait:
+                    time.sleep(wait)
+
+            try:
+                status, reason, retry_after, content = self.__send(method, path, body)
+            except (_ConnectError, OSError, http.client.HTTPException) as e:
+                # like other transports, failures opening a connection (refused,
+                # dns, connect timeout, tls) are safe to retry for sends too
+                connect_error = isinstance(e, _ConnectError)
+                delay = self.retry and self.retry.next_delay(method, attempt, connection_error=connect_error)
+                if delay is None:
+                    raise HTTPError(e.__cause__ if connect_error else e)
+            else:
+                delay = self.retry and self.retry.next_delay(
+                    method, attempt, status=status, retry_after=parse_retry_after(retry_after))
+                if delay is None:
+                    break
+
+            time.sleep(delay)
+            attempt += 1
+
+        if status not in self.__supported_status_codes:
+            raise HTTPError(f"{status} {reason} for url: {urljoin(self.base_url, url)}")
+
+        return parse_response(content, self.codec)
+
+    def get(self, url, params=None):
+        """
+        make http GET request with prefixed base url and given data
+        """
+        return self.req("GET", url, None, params)
+
+    def post(self, url, data):
+        """
+        make http POST request with prefixed base url and given data
+        """
+        return self.req("POST", url, data)
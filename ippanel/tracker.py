@@ -0,0 +1,302 @@
+import asyncio
+import heapq
+import threading
+import time
+from collections import namedtuple
+
+from ippanel.bulk import DEFAULT_CONCURRENCY, aimap_unordered, imap_unordered
+from ippanel.cache import FINAL_MESSAGE_STATES
+from ippanel.ratelimit import TokenBucket
+
+# default seconds between first polls of a message, and after its state changed
+DEFAULT_MIN_INTERVAL = 10
+# default most seconds between polls of a message whose state does not change
+DEFAULT_MAX_INTERVAL = 600
+# default factor the poll interval grows by while the state does not change
+DEFAULT_BACKOFF = 2
+# default seconds after which a message that never reaches a final state is dropped
+DEFAULT_MAX_AGE = 24 * 3600
+
+StatusChange = namedtuple("StatusChange", ["message_id", "previous", "state", "message", "final", "error"])
+StatusChange.__doc__ = """
+state change of a tracked message, previous is None on its first poll.
+
+a poll that raised is published too, with the exception as error, the
+last known state as previous and state, and message None.
+"""
+
+
+class _Entry:
+    __slots__ = ("state", "interval", "due_at", "added_at")
+
+    def __init__(self, state, interval, due_at):
+        self.state = state
+        self.interval = interval
+        self.due_at = due_at
+        self.added_at = due_at
+
+
+class _BaseDeliveryTracker:
+    """
+    schedule of tracked messages shared by sync and async trackers
+    """
+
+    def __init__(self, client, min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL,
+                 backoff=DEFAULT_BACKOFF, max_age=DEFAULT_MAX_AGE, rate=None, concurrency=DEFAULT_CONCURRENCY,
+                 final_states=FINAL_MESSAGE_STATES):
+        self.client = client
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.max_age = max_age
+        self.budget = TokenBucket(rate) if rate else None
+        self.concurrency = concurrency
+        self.final_states = final_states
+        self.__entries = {}
+        self.__heap = []
+        self.__callbacks = []
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, message_id):
+        return message_id in self.__entries
+
+    def track(self, message_id, state=None):
+        """
+        start tracking a message, it is polled on the next round
+        """
+        now = time.monotonic()
+        with self.__lock:
+            if message_id in self.__entries:
+                return
+            self.__entries[message_id] = _Entry(state, self.min_interval, now)
+            heapq.heappush(self.__heap, (now, message_id))
+
+    def untrack(self, message_id):
+        with self.__lock:
+            self.__entries.pop(message_id, None)
+
+    def subscribe(self, callback):
+        """
+        call callback with every :class:`StatusChange <StatusChange>`
+        """
+        self.__callbacks.append(callback)
+
+    def unsubscribe(self, callback):
+        self.__callbacks.remove(callback)
+
+    def _due(self, now):
+        """
+        pop ids of messages due for a poll
+        """
+        due = []
+        with self.__lock:
+            heap = self.__heap
+            while heap and heap[0][0] <= now:
+                due_at, message_id = heapq.heappop(heap)
+                entry = self.__entries.get(message_id)
+                # skip heap items of untracked or rescheduled messages
+                if entry is not None and entry.due_at == due_at:
+                    due.append(message_id)
+        return due
+
+    def _next_wait(self, now):
+        """
+        seconds until the next message is due, None when nothing is tracked
+        """
+        with self.__lock:
+            while self.__heap:
+                due_at, message_id = self.__heap[0]
+                entry = self.__entries.get(message_id)
+                if entry is not None and entry.due_at == due_at:
+                    return max(0.0, due_at - now)
+                heapq.heappop(self.__heap)
+        return None
+
+    def _update(self, message_id, message, error, now):
+        """
+        reschedule a polled message and return its change or error, if any
+        """
+        with self.__lock:
+            entry = self.__entries.get(message_id)
+            if entry is None:
+                return None
+
+            state = entry.state if error is not None else message.state
+            changed = state != entry.state
+            final = state in self.final_states
+            previous, entry.state = entry.state, state
+
+            if final or now - entry.added_at >= self.max_age:
+                del self.__entries[message_id]
+            else:
+                entry.interval = self.min_interval if changed else min(entry.interval * self.backoff,
+                                                                       self.max_interval)
+                entry.due_at = now + entry.interval
+                heapq.heappush(self.__heap, (entry.due_at, message_id))
+
+        if not changed and error is None:
+            return None
+
+        change = StatusChange(message_id, previous, state, message, final, error)
+        for callback in list(self.__callbacks):
+            # a failing subscriber must not stop polling of other messages
+            try:
+                callback(change)
+            except Exception:
+                import logging
+                logging.getLogger(__name__).exception("delivery tracker callback %r failed", callback)
+        return change
+
+    def _requeue(self, message_ids):
+        """
+        schedule due messages again whose poll did not finish, so a poll
+        that raised does not leave them out of the schedule
+        """
+        with self.__lock:
+            for message_id in message_ids:
+                entry = self.__entries.get(message_id)
+                if entry is not None:
+                    heapq.heappush(self.__heap, (entry.due_at, message_id))
+
+
+class DeliveryTracker(_BaseDeliveryTracker):
+    """
+    poll state of many messages on one adaptive schedule.
+
+    a message is polled every min_interval seconds at first, the interval
+    grows by backoff up to max_interval while its state does not change and
+    restarts when it does. messages are dropped once they reach a final
+    state or after max_age seconds. rate caps polls per second of all
+    messages together.
+
+    changes and failed polls are published to subscribed callbacks, and
+    yielded by events() or returned by poll(). with a client cache,
+    min_interval should not be shorter than the get_message ttl.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.__wakeup = threading.Event()
+        self.__stopped = threading.Event()
+        self.__thread = None
+
+    def track(self, message_id, state=None):
+        super().track(message_id, state)
+        self.__wakeup.set()
+
+    def _get(self, message_id):
+        if self.budget is not None:
+            self.budget.acquire()
+        return self.client.get_message(message_id)
+
+    def poll(self):
+        """
+        poll every due message once and return their changes
+        """
+        due = self._due(time.monotonic())
+        pending = set(due)
+        changes = []
+        try:
+            for message_id, message, error in imap_unordered(self._get, due, self.concurrency):
+                pending.discard(message_id)
+                change = self._update(message_id, message, error, time.monotonic())
+                if change is not None:
+                    changes.append(change)
+        finally:
+            self._requeue(pending)
+        return changes
+
+    def events(self):
+        """
+        poll in the calling thread and yield changes until no message is
+        tracked anymore
+        """
+        while True:
+            for change in self.poll():
+                yield change
+
+            wait = self._next_wait(time.monotonic())
+            if wait is None:
+                return
+            self.__wakeup.clear()
+            self.__wakeup.wait(wait)
+
+    def start(self):
+        """
+        poll on a background thread until stop is called
+        """
+        if self.__thread is not None:
+            return
+        self.__stopped.clear()
+        self.__thread = threading.Thread(target=self.__run, name="ippanel-delivery-tracker", daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        if self.__thread is None:
+            return
+        self.__stopped.set()
+        self.__wakeup.set()
+        self.__thread.join()
+        self.__thread = None
+
+    def __run(self):
+        while not self.__stopped.is_set():
+            try:
+                self.poll()
+            except Exception:
+                # the thread keeps polling, messages of a failed poll were requeued
+                import logging
+                logging.getLogger(__name__).exception("delivery tracker poll failed")
+            wait = self._next_wait(time.monotonic())
+            self.__wakeup.clear()
+            if not self.__stopped.is_set():
+                self.__wakeup.wait(self.max_interval if wait is None else wait)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+class AsyncDeliveryTracker(_BaseDeliveryTracker):
+    """
+    delivery tracker polling with an :class:`AsyncClient <AsyncClient>`,
+    changes are yielded by the async iterator of events(). iterate it in a
+    task to poll in background.
+    """
+
+    async def _get(self, message_id):
+        if self.budget is not None:
+            wait = self.budget.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+        return await self.client.get_message(message_id)
+
+    async def poll(self):
+        due = self._due(time.monotonic())
+        pending = set(due)
+        changes = []
+        try:
+            async for message_id, message, error in aimap_unordered(self._get, due, self.concurrency):
+                pending.discard(message_id)
+                change = self._update(message_id, message, error, time.monotonic())
+                if change is not None:
+                    changes.append(change)
+        finally:
+            self._requeue(pending)
+        return changes
+
+    async def events(self):
+        while True:
+            for change in await self.poll():
+                yield change
+
+            wait = self._next_wait(time.monotonic())
+            if wait is None:
+                return
+            await asyncio.sleep(wait)
@@ -14,6 +14,10 @@ setuptools.setup(
     url="https://github.com/ippanel/python-rest-sdk",
     packages=setuptools.find_packages(),
     install_requires=['requests>=2.28.1'],
+    extras_require={
+        'async': ['httpx>=0.23'],
+        'http2': ['httpx[http2]>=0.23'],
+    },
     license='BSD-2-Clause',
     classifiers=[
         'Programming Language :: Python',
@@ -0,0 +1,20 @@
+from ippanel import Response
+
+
+def ok_response(data, meta=None):
+    """
+    successful api response envelope carrying data
+    """
+    body = {
+        "status": "OK",
+        "code": 200,
+        "error_message": "",
+        "data": data,
+    }
+    if meta is not None:
+        body["meta"] = meta
+    return Response(body)
+
+
+def message_id_response(message_id):
+    return ok_response({"message_id": message_id})
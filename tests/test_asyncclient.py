@@ -0,0 +1,72 @@
+import unittest
+from ippanel import AsyncClient, Error, Response
+import json
+from unittest import mock
+
+
+class TestAsyncClient(unittest.IsolatedAsyncioTestCase):
+    async def test_send_pattern(self):
+        http_client = mock.AsyncMock()
+        http_client.post.return_value = Response(json.loads(r'''
+        {
+            "status": "OK",
+            "code": "OK",
+            "error_message": "",
+            "data": {
+                "message_id": 70671101
+            }
+        }
+        '''))
+
+        sms = AsyncClient("", http_client)
+        message_id = await sms.send_pattern(
+            "6gr7ngjmhi", "9810001", "+98912xxxxxxx", {"name": "IPPanel"})
+
+        http_client.post.assert_awaited_once_with("sms/pattern/normal/send", {
+            "code": "6gr7ngjmhi",
+            "sender": "9810001",
+            "recipient": "+98912xxxxxxx",
+            "variable": {"name": "IPPanel"},
+        })
+        self.assertEqual(message_id, 70671101)
+
+    async def test_fetch_statuses(self):
+        http_client = mock.AsyncMock()
+        http_client.get.return_value = Response(json.loads(r'''
+        {
+            "status": "OK",
+            "code": "OK",
+            "error_message": "",
+            "data": {
+                "deliveries": [
+                    {
+                        "recipient": "+98912xxxxxxx",
+                        "status": "delivered"
+                    }
+                ]
+            },
+            "meta": {
+                "total": 1,
+                "pages": 1,
+                "limit": 1,
+                "page": 0,
+                "prev": null,
+                "next": null
+            }
+        }
+        '''))
+
+        sms = AsyncClient("", http_client)
+        statuses, pagination_info = await sms.fetch_statuses(52738671, 0, 10)
+
+        self.assertEqual(statuses[0].recipient, "+98912xxxxxxx")
+        self.assertEqual(pagination_info.total, 1)
+
+    async def test_error_response(self):
+        http_client = mock.AsyncMock()
+        http_client.get.side_effect = Error(422, {"message_id": ["invalid"]})
+
+        sms = AsyncClient("", http_client)
+
+        with self.assertRaises(Error):
+            await sms.get_message(1)
@@ -0,0 +1,68 @@
+import threading
+import time
+import unittest
+from ippanel import AsyncClient, Client, Error
+from tests import message_id_response
+from unittest import mock
+
+
+class TestBulk(unittest.TestCase):
+    def test_send_pattern_many(self):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def post(url, data):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+            if data["recipient"] == "bad":
+                raise Error(422, {"recipient": ["invalid"]})
+            return message_id_response(int(data["recipient"]))
+
+        http_client = mock.MagicMock()
+        http_client.post.side_effect = post
+
+        items = ((str(i) if i != 7 else "bad", {"code": i}) for i in range(20))
+        sms = Client("", http_client)
+        results = sorted(sms.send_pattern_many("6gr7ngjmhi", "9810001", items, concurrency=4))
+
+        self.assertEqual(len(results), 20)
+        self.assertLessEqual(running[1], 4)
+        self.assertEqual(results[3].message_id, 3)
+        self.assertEqual(results[3].recipient, "3")
+        self.assertIsNone(results[7].message_id)
+        self.assertIsInstance(results[7].error, Error)
+
+
+class TestAsyncBulk(unittest.IsolatedAsyncioTestCase):
+    async def test_send_pattern_many(self):
+        http_client = mock.AsyncMock()
+        http_client.post.side_effect = lambda url, data: message_id_response(int(data["recipient"]))
+
+        sms = AsyncClient("", http_client)
+        results = [r async for r in sms.send_pattern_many("6gr7ngjmhi", "9810001", ((str(i), {}) for i in range(10)), concurrency=3)]
+
+        self.assertEqual(sorted(r.message_id for r in results), list(range(10)))
+
+
+class TestCampaign(unittest.TestCase):
+    def test_send_campaign(self):
+        def post(url, data):
+            if "98900000004" in data["recipient"]:
+                raise Error(500, "internal error")
+            return message_id_response(int(data["description"]["count_recipient"]) * 100 + len(data["recipient"]))
+
+        http_client = mock.MagicMock()
+        http_client.post.side_effect = post
+
+        recipients = (f"989{i:08d}" for i in range(10))
+        sms = Client("", http_client)
+        manifest = sms.send_campaign("9810001", recipients, "Hello", "campaign", chunk_size=4, concurrency=2)
+
+        self.assertEqual([(r.index, r.start, r.end) for r in manifest], [(0, 0, 4), (1, 4, 8), (2, 8, 10)])
+        self.assertEqual(manifest[0].message_id, 404)
+        self.assertIsInstance(manifest[1].error, Error)
+        self.assertEqual(manifest[2].message_id, 202)
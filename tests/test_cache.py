@@ -0,0 +1,91 @@
+import io
+import threading
+import time
+import unittest
+from ippanel import Client, Message, Recipient, ResponseCache
+from tests import ok_response
+from unittest import mock
+
+
+class TestCache(unittest.TestCase):
+    def test_get_credit_cached(self):
+        http_client = mock.MagicMock()
+        http_client.get.return_value = ok_response({"credit": 30000})
+        cache = ResponseCache()
+
+        sms = Client("", http_client, cache=cache)
+        self.assertEqual(sms.get_credit(), 30000)
+        self.assertEqual(sms.get_credit(), 30000)
+
+        self.assertEqual(http_client.get.call_count, 1)
+        self.assertEqual(cache.stats["hits"], 1)
+        self.assertEqual(cache.stats["misses"], 1)
+
+    def test_single_flight(self):
+        started = threading.Event()
+
+        def get(url, params=None):
+            started.set()
+            time.sleep(0.05)
+            return ok_response({"credit": 30000})
+
+        http_client = mock.MagicMock()
+        http_client.get.side_effect = get
+        cache = ResponseCache(ttls={"get_credit": 0})
+        sms = Client("", http_client, cache=cache)
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(sms.get_credit())) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [30000] * 5)
+        self.assertEqual(http_client.get.call_count, 1)
+        self.assertEqual(cache.stats["coalesced"], 4)
+        self.assertEqual(cache.stats["size"], 0)
+
+    def test_final_state_ttl(self):
+        cache = ResponseCache(ttls={"get_message": 5}, final_ttl=600)
+
+        self.assertEqual(cache.ttl("get_message", Message({"state": "active"})), 5)
+        self.assertEqual(cache.ttl("get_message", Message({"state": "finish"})), 600)
+        self.assertEqual(cache.ttl("fetch_statuses", ([Recipient({"status": "delivered"})], None)), 600)
+        self.assertEqual(cache.ttl("fetch_statuses", ([Recipient({"status": "pending"})], None)), 10)
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(maxsize=2)
+        cache.fetch("get_message", 1, lambda: Message({}))
+        cache.fetch("get_message", 2, lambda: Message({}))
+        cache.fetch("get_message", 1, lambda: Message({}))
+        cache.fetch("get_message", 3, lambda: Message({}))
+        cache.fetch("get_message", 1, lambda: Message({}))
+
+        self.assertEqual(cache.stats["evictions"], 1)
+        self.assertEqual(cache.stats["hits"], 2)
+        self.assertEqual(cache.stats["misses"], 3)
+
+    def test_results_copied(self):
+        cache = ResponseCache()
+        page = ([Recipient({"status": "delivered"})], None)
+
+        first = cache.fetch("fetch_statuses", 1, lambda: page)
+        first[0].clear()
+        second = cache.fetch("fetch_statuses", 1, lambda: page)
+
+        self.assertEqual(len(second[0]), 1)
+        self.assertIsNot(second[0], cache.fetch("fetch_statuses", 1, lambda: page)[0])
+
+    def test_iterators_not_cached(self):
+        http_client = mock.MagicMock()
+        http_client.get.return_value = ok_response(
+            {"deliveries": [{"recipient": "+98912xxxxxxx", "status": "delivered"}]},
+            {"total": 1, "pages": 1, "limit": 10, "page": 0, "prev": None, "next": None},
+        )
+        cache = ResponseCache()
+        sms = Client("", http_client, cache=cache)
+
+        self.assertEqual(len(list(sms.iter_statuses(1))), 1)
+        self.assertEqual(sms.export_statuses(1, io.StringIO()), 1)
+        self.assertEqual(cache.stats["size"], 0)
@@ -0,0 +1,27 @@
+import unittest
+from ippanel.codec import CODECS, Codec, get_codec
+
+
+class TestCodec(unittest.TestCase):
+    def test_round_trip(self):
+        data = {"message": "سلام", "recipient": ["98912xxxxxxx"], "variable": {"code": 1234}}
+
+        for name in CODECS:
+            try:
+                codec = get_codec(name)
+            except ImportError:
+                continue
+
+            with self.subTest(codec=name):
+                encoded = codec.dumps(data)
+                self.assertIsInstance(encoded, bytes)
+                self.assertIn("سلام".encode(), encoded)
+                self.assertEqual(codec.loads(encoded), data)
+
+    def test_default_codec(self):
+        self.assertIsInstance(get_codec(), Codec)
+        self.assertIs(get_codec(), get_codec())
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            get_codec("yaml")
@@ -0,0 +1,39 @@
+import unittest
+from ippanel import Client
+from tests import message_id_response, ok_response
+from unittest import mock
+
+
+class TestCreditTracker(unittest.TestCase):
+    def test_sends_charged_locally(self):
+        http_client = mock.MagicMock()
+        http_client.get.return_value = ok_response({"credit": 1000})
+        http_client.post.return_value = message_id_response(70671101)
+
+        sms = Client("", http_client)
+        credit = sms.track_credit(price_per_part=10, resync_interval=3600)
+
+        self.assertEqual(credit.balance, 1000)
+        sms.send("9810001", ["98912xxxxxxx", "98913xxxxxxx"], "a" * 200, "summary")
+        sms.send_pattern("6gr7ngjmhi", "9810001", "98912xxxxxxx", {})
+
+        self.assertEqual(credit.balance, 1000 - 40 - 10)
+        self.assertTrue(credit.can_afford(900))
+        self.assertEqual(http_client.get.call_count, 1)
+
+    def test_resync_under_threshold(self):
+        http_client = mock.MagicMock()
+        http_client.get.return_value = ok_response({"credit": 100})
+        http_client.post.return_value = message_id_response(70671101)
+
+        sms = Client("", http_client)
+        credit = sms.track_credit(price_per_part=30, low_threshold=50)
+
+        self.assertEqual(credit.balance, 100)
+        sms.send_pattern("6gr7ngjmhi", "9810001", "98912xxxxxxx", {})
+        self.assertEqual(credit.balance, 70)
+        sms.send_pattern("6gr7ngjmhi", "9810001", "98912xxxxxxx", {})
+        http_client.get.return_value = ok_response({"credit": 45})
+
+        self.assertEqual(credit.balance, 45)
+        self.assertEqual(http_client.get.call_count, 2)
@@ -0,0 +1,52 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from ippanel import Client, HTTPError
+from unittest import mock
+
+from tests.test_pagination import _statuses_response
+
+
+class TestExport(unittest.TestCase):
+    def test_export_csv(self):
+        http_client = mock.MagicMock()
+        http_client.get.side_effect = lambda url, params: _statuses_response(params["page"], params["per_page"], 25)
+
+        out = io.StringIO()
+        sms = Client("", http_client)
+        rows = sms.export_statuses(52738671, out, workers=3, page_size=10)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(rows, 25)
+        self.assertEqual(lines[0], "recipient,status")
+        self.assertEqual(lines[1:], [f"+98912{i:07d},delivered" for i in range(25)])
+
+    def test_export_resume(self):
+        failed = []
+
+        def get(url, params):
+            if params["page"] == 2 and not failed:
+                failed.append(True)
+                raise HTTPError("connection reset")
+            return _statuses_response(params["page"], params["per_page"], 35)
+
+        http_client = mock.MagicMock()
+        http_client.get.side_effect = get
+        sms = Client("", http_client)
+
+        with tempfile.TemporaryDirectory() as directory:
+            out = os.path.join(directory, "statuses.jsonl")
+            checkpoint = os.path.join(directory, "statuses.checkpoint")
+
+            with self.assertRaises(HTTPError):
+                sms.export_statuses(52738671, out, workers=1, format="jsonl", page_size=10, checkpoint=checkpoint)
+
+            rows = sms.export_statuses(52738671, out, workers=1, format="jsonl", page_size=10, checkpoint=checkpoint)
+
+            with open(out) as f:
+                recipients = [json.loads(line)["recipient"] for line in f]
+
+        self.assertEqual(rows, 35)
+        self.assertEqual(recipients, [f"+98912{i:07d}" for i in range(35)])
@@ -0,0 +1,347 @@
+import json
+import socket
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ippanel import (
+    CircuitBreaker,
+    CircuitOpenError,
+    Client,
+    HedgePolicy,
+    HTTP2Client,
+    HTTPClient,
+    HTTPError,
+    LatencyHistograms,
+    RetryPolicy,
+    StdlibHTTPClient,
+)
+from ippanel.http2client import http2_available, httpx
+from unittest import mock
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.ports.add(self.client_address[1])
+        self.server.hits += 1
+        if self.server.delays:
+            time.sleep(self.server.delays.pop(0))
+        if self.server.failures:
+            self.send_response(self.server.failures.pop(0))
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = json.dumps({
+            "status": "OK",
+            "code": 200,
+            "error_message": "",
+            "data": {"credit": 1000},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+class _ServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.ports = set()
+        self.server.failures = []
+        self.server.hits = 0
+        self.server.delays = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/api/v1/"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestHTTPClient(_ServerTestCase):
+    def test_connection_reused(self):
+        with HTTPClient("", self.base_url, 5) as http_client:
+            sms = Client("", http_client)
+            for _ in range(5):
+                self.assertEqual(sms.get_credit(), 1000)
+
+        self.assertEqual(len(self.server.ports), 1)
+
+    def test_close_and_reopen(self):
+        http_client = HTTPClient("", self.base_url, 5, pool_maxsize=2)
+        http_client.get("sms/accounting/credit/show")
+        http_client.close()
+        http_client.get("sms/accounting/credit/show")
+        http_client.close()
+
+        self.assertEqual(len(self.server.ports), 2)
+
+    def test_retry_on_unavailable(self):
+        self.server.failures = [503, 502]
+        retry = RetryPolicy(max_attempts=3, backoff_factor=0)
+
+        with HTTPClient("", self.base_url, 5, retry=retry) as http_client:
+            self.assertEqual(Client("", http_client).get_credit(), 1000)
+
+        self.assertEqual(self.server.hits, 3)
+        self.assertEqual(retry.stats["retries"], 2)
+
+    def test_retry_exhausted(self):
+        self.server.failures = [503, 503, 503]
+        retry = RetryPolicy(max_attempts=2, backoff_factor=0)
+
+        with HTTPClient("", self.base_url, 5, retry=retry) as http_client:
+            with self.assertRaises(HTTPError):
+                http_client.get("sms/accounting/credit/show")
+
+        self.assertEqual(self.server.hits, 2)
+        self.assertEqual(retry.stats["exhausted"], 1)
+
+    def test_post_not_retried_after_sent(self):
+        hits = []
+        listener = socket.create_server(("127.0.0.1", 0))
+
+        def serve():
+            # read every request, then drop the connection without answering
+            while True:
+                try:
+                    connection, _ = listener.accept()
+                except OSError:
+                    return
+                with connection:
+                    if connection.recv(65536):
+                        hits.append(1)
+
+        threading.Thread(target=serve, daemon=True).start()
+        retry = RetryPolicy(max_attempts=3, backoff_factor=0)
+        base_url = f"http://127.0.0.1:{listener.getsockname()[1]}/api/v1/"
+        try:
+            with HTTPClient("", base_url, 5, retry=retry) as http_client:
+                with self.assertRaises(HTTPError):
+                    http_client.post("sms/send/webservice/single", {"message": "Hello"})
+        finally:
+            listener.close()
+
+        self.assertEqual(len(hits), 1)
+        self.assertEqual(retry.stats["retries"], 0)
+
+    def test_post_retried_on_refused_connection(self):
+        unused = socket.create_server(("127.0.0.1", 0))
+        base_url = f"http://127.0.0.1:{unused.getsockname()[1]}/api/v1/"
+        unused.close()
+        retry = RetryPolicy(max_attempts=2, backoff_factor=0)
+
+        with HTTPClient("", base_url, 5, retry=retry) as http_client:
+            with self.assertRaises(HTTPError):
+                http_client.post("sms/send/webservice/single", {"message": "Hello"})
+
+        self.assertEqual(retry.stats["connection_retries"], 1)
+
+    def test_listeners(self):
+        self.server.failures = [503]
+        events = []
+        histograms = LatencyHistograms()
+        retry = RetryPolicy(max_attempts=3, backoff_factor=0)
+
+        with HTTPClient("", self.base_url, 5, retry=retry, listeners=[events.append]) as http_client:
+            http_client.add_listener(histograms)
+            for _ in range(3):
+                http_client.get("sms/message/show-recipient/message-id/1")
+
+        self.assertEqual([event.endpoint for event in events], ["sms/message/show-recipient/message-id/{id}"] * 3)
+        self.assertEqual([event.retries for event in events], [1, 0, 0])
+        self.assertEqual([event.reused for event in events], [True, True, True])
+        self.assertEqual(events[0].status, 200)
+        self.assertGreater(events[0].bytes_in, 0)
+        self.assertGreaterEqual(events[0].total, events[0].network + events[0].decode + events[0].model)
+
+        stats = histograms.snapshot()["GET sms/message/show-recipient/message-id/{id}"]
+        self.assertEqual(stats["count"], 3)
+        self.assertLessEqual(stats["p50"], stats["p99"])
+        self.assertLessEqual(stats["p99"], stats["max"])
+
+    def test_failing_listener_ignored(self):
+        def listener(event):
+            raise RuntimeError("listener failed")
+
+        with HTTPClient("", self.base_url, 5, listeners=[listener]) as http_client:
+            with self.assertLogs("ippanel.httpclient", "ERROR"):
+                self.assertEqual(Client("", http_client).get_credit(), 1000)
+
+    def test_circuit_breaker(self):
+        self.server.failures = [503] * 4
+        breaker = CircuitBreaker(window=4, min_calls=4, open_duration=0.2)
+
+        with HTTPClient("", self.base_url, 5, breaker=breaker) as http_client:
+            for _ in range(4):
+                with self.assertRaises(HTTPError):
+                    http_client.get("sms/accounting/credit/show")
+            with self.assertRaises(CircuitOpenError):
+                http_client.get("sms/accounting/credit/show")
+            self.assertEqual(self.server.hits, 4)
+            self.assertEqual(breaker.state("sms/accounting/credit/show"), "open")
+            # other endpoints have their own circuit
+            http_client.get("sms/message/all")
+
+            time.sleep(0.25)
+            http_client.get("sms/accounting/credit/show")
+            self.assertEqual(breaker.state("sms/accounting/credit/show"), "closed")
+
+        self.assertEqual(breaker.stats, {"opened": 1, "rejected": 1, "probes": 1})
+
+    def test_hedged_read(self):
+        self.server.delays = [0.5]
+        hedge = HedgePolicy(delay=0.05, max_ratio=1)
+
+        with HTTPClient("", self.base_url, 5, hedge=hedge) as http_client:
+            started = time.monotonic()
+            self.assertEqual(Client("", http_client).get_credit(), 1000)
+            self.assertLess(time.monotonic() - started, 0.4)
+
+        self.assertEqual(self.server.hits, 2)
+        self.assertEqual(hedge.stats, {"reads": 1, "hedged": 1, "hedge_wins": 1})
+
+    def test_hedge_skipped_without_free_worker(self):
+        self.server.delays = [0.5, 0.5]
+        hedge = HedgePolicy(delay=0.05, max_ratio=1)
+
+        # pool_maxsize of 1 gives two hedge workers, both taken by slow reads
+        with HTTPClient("", self.base_url, 5, pool_maxsize=1, hedge=hedge) as http_client:
+            threads = [threading.Thread(target=http_client.get, args=("sms/accounting/credit/show",))
+                       for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            time.sleep(0.1)
+
+            started = time.monotonic()
+            http_client.get("sms/accounting/credit/show")
+            self.assertLess(time.monotonic() - started, 0.3)
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(self.server.hits, 3)
+        self.assertEqual(hedge.stats["hedged"], 0)
+
+    def test_circuit_probe_released_on_interrupt(self):
+        self.server.failures = [503] * 2
+        breaker = CircuitBreaker(window=2, min_calls=2, open_duration=0.05)
+
+        with HTTPClient("", self.base_url, 5, breaker=breaker) as http_client:
+            for _ in range(2):
+                with self.assertRaises(HTTPError):
+                    http_client.get("sms/accounting/credit/show")
+            time.sleep(0.1)
+
+            with mock.patch.object(http_client.session, "send", side_effect=KeyboardInterrupt):
+                with self.assertRaises(KeyboardInterrupt):
+                    http_client.get("sms/accounting/credit/show")
+            http_client.get("sms/accounting/credit/show")
+
+        self.assertEqual(breaker.state("sms/accounting/credit/show"), "closed")
+
+    def test_client_transport(self):
+        self.assertIsInstance(Client("").client, HTTPClient)
+        with self.assertRaises(ValueError):
+            Client("", transport="spdy")
+
+    def test_endpoint_timeouts(self):
+        self.server.delays = [0.5, 0.5]
+        timeouts = {"sms/message/show-recipient/message-id/{id}": (5, 0.05)}
+
+        with HTTPClient("", self.base_url, 5, timeouts=timeouts) as http_client:
+            with self.assertRaises(HTTPError):
+                http_client.get("sms/message/show-recipient/message-id/1")
+            http_client.get("sms/accounting/credit/show")
+
+    def test_prepare(self):
+        http_client = HTTPClient("key", self.base_url, 5, codec="json")
+
+        prepared, _ = http_client.prepare("GET", "sms/message/show-recipient/message-id/1", None, {"page": 2, "per_page": 10})
+        self.assertEqual(prepared.url, self.base_url + "sms/message/show-recipient/message-id/1?page=2&per_page=10")
+        self.assertEqual(prepared.headers["apikey"], "key")
+
+        first, _ = http_client.prepare("POST", "sms/pattern/normal/send", {"code": "a"})
+        second, _ = http_client.prepare("POST", "sms/pattern/normal/send", {"code": "b"})
+        self.assertEqual(first.body, b'{"code": "a"}')
+        self.assertEqual(second.body, b'{"code": "b"}')
+        self.assertEqual(second.headers["Content-Length"], "13")
+
+
+@unittest.skipIf(httpx is None, "httpx is not installed")
+class TestHTTP2Client(_ServerTestCase):
+    def test_falls_back_to_http1(self):
+        self.server.failures = [503]
+        retry = RetryPolicy(max_attempts=2, backoff_factor=0)
+
+        with HTTP2Client("", self.base_url, 5, retry=retry) as http_client:
+            sms = Client("", http_client)
+            for _ in range(3):
+                self.assertEqual(sms.get_credit(), 1000)
+            self.assertEqual(http_client.http_version, "HTTP/1.1")
+
+        self.assertEqual(len(self.server.ports), 1)
+        self.assertEqual(retry.stats["retries"], 1)
+
+    @unittest.skipUnless(http2_available(), "h2 is not installed")
+    def test_without_h2(self):
+        with mock.patch("ippanel.http2client.h2", None):
+            self.assertFalse(HTTP2Client("", self.base_url, 5).http2)
+        self.assertTrue(HTTP2Client("", self.base_url, 5).http2)
+
+    def test_client_transport(self):
+        self.assertIsInstance(Client("", transport="http2").client, HTTP2Client)
+
+
+class TestStdlibHTTPClient(_ServerTestCase):
+    def test_connection_reused(self):
+        self.server.failures = [503]
+        retry = RetryPolicy(max_attempts=2, backoff_factor=0)
+
+        with StdlibHTTPClient("", self.base_url, 5, retry=retry) as http_client:
+            sms = Client("", http_client)
+            for _ in range(3):
+                self.assertEqual(sms.get_credit(), 1000)
+            http_client.get("sms/message/show-recipient/message-id/1", {"page": 2, "per_page": 10})
+
+        self.assertEqual(len(self.server.ports), 1)
+        self.assertEqual(retry.stats["retries"], 1)
+
+    def test_unsupported_status(self):
+        self.server.failures = [503]
+
+        with StdlibHTTPClient("", self.base_url, 5) as http_client:
+            with self.assertRaises(HTTPError):
+                http_client.get("sms/accounting/credit/show")
+            self.assertEqual(http_client.get("sms/accounting/credit/show").data["credit"], 1000)
+
+    def test_post_retried_on_connect_errors(self):
+        create_connection = socket.create_connection
+        errors = [socket.gaierror(-2, "Name or service not known"), socket.timeout("timed out")]
+
+        def connect(*args, **kwargs):
+            if errors:
+                raise errors.pop(0)
+            return create_connection(*args, **kwargs)
+
+        retry = RetryPolicy(max_attempts=3, backoff_factor=0)
+        with mock.patch("socket.create_connection", side_effect=connect):
+            with StdlibHTTPClient("", self.base_url, 5, retry=retry) as http_client:
+                self.assertEqual(http_client.post("sms/send/webservice/single", {}).data["credit"], 1000)
+
+        self.assertEqual(retry.stats["connection_retries"], 2)
+
+    def test_client_transport(self):
+        self.assertIsInstance(Client("", transport="stdlib").client, StdlibHTTPClient)
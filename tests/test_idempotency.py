@@ -0,0 +1,103 @@
+import os
+import tempfile
+import threading
+import unittest
+from ippanel import Client, HTTPError, IdempotencyStore, Outbox, SQLiteIdempotencyStore
+from tests import message_id_response
+from unittest import mock
+
+
+class TestIdempotency(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_same_key_sent_once(self):
+        http_client = mock.MagicMock()
+        http_client.post.side_effect = [message_id_response(1), message_id_response(2)]
+        sms = Client("", http_client, idempotency=IdempotencyStore())
+
+        self.assertEqual(sms.send("9810001", ["98912xxxxxxx"], "Hello", "summary", idempotency_key="a"), 1)
+        self.assertEqual(sms.send("9810001", ["98912xxxxxxx"], "Hello", "summary", idempotency_key="a"), 1)
+        self.assertEqual(sms.send_pattern("6gr7ngjmhi", "9810001", "+98912xxxxxxx", {}, idempotency_key="b"), 2)
+        self.assertEqual(http_client.post.call_count, 2)
+
+        with self.assertRaises(ValueError):
+            Client("", http_client).send("9810001", ["98912xxxxxxx"], "Hello", "summary", idempotency_key="a")
+
+    def test_failures_not_stored(self):
+        http_client = mock.MagicMock()
+        http_client.post.side_effect = [HTTPError("connection reset"), message_id_response(1)]
+        sms = Client("", http_client, idempotency=IdempotencyStore())
+
+        with self.assertRaises(HTTPError):
+            sms.send_pattern("6gr7ngjmhi", "9810001", "+98912xxxxxxx", {}, idempotency_key="a")
+        self.assertEqual(sms.send_pattern("6gr7ngjmhi", "9810001", "+98912xxxxxxx", {}, idempotency_key="a"), 1)
+
+    def test_concurrent_sends_coalesced(self):
+        store = IdempotencyStore()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def send():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 1
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(store.run("a", send))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        started.wait(5)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [1, 1, 1, 1])
+        self.assertEqual(len(calls), 1)
+
+    def test_expired_and_evicted(self):
+        store = IdempotencyStore(maxsize=2, ttl=0)
+        store.set("a", 1)
+        self.assertIsNone(store.get("a"))
+
+        store = IdempotencyStore(maxsize=2)
+        for key, message_id in (("a", 1), ("b", 2), ("c", 3)):
+            store.set(key, message_id)
+        self.assertIsNone(store.get("a"))
+        self.assertEqual(store.get("c"), 3)
+
+    def test_sqlite_store_persists(self):
+        path = os.path.join(self.directory.name, "idempotency.db")
+        store = SQLiteIdempotencyStore(path)
+        store.run("a", lambda: 1)
+        store.close()
+
+        store = SQLiteIdempotencyStore(path)
+        self.assertEqual(store.run("a", lambda: 2), 1)
+        self.assertIsNone(store.get("b"))
+        store.close()
+
+    def test_outbox_resend_skipped(self):
+        http_client = mock.MagicMock()
+        http_client.post.return_value = message_id_response(1)
+        sms = Client("", http_client, idempotency=IdempotencyStore())
+
+        with Outbox(os.path.join(self.directory.name, "outbox.db"), lease=0) as outbox:
+            outbox_id = outbox.enqueue_pattern("6gr7ngjmhi", "9810001", "+98912xxxxxxx", {})
+            # the worker sent the message but died before recording it
+            item = outbox.claim()[0]
+            sms.send_pattern(*item[2], idempotency_key=f"outbox:{os.path.abspath(outbox.path)}:{outbox_id}")
+
+            self.assertEqual(outbox.drain(sms), {"sent": 1, "failed": 0, "pending": 0})
+            self.assertEqual(outbox.get(outbox_id)[:2], ("sent", 1))
+
+        self.assertEqual(http_client.post.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+import unittest
+
+import ippanel
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# milliseconds importing the client may take, override on slow machines
+IMPORT_BUDGET_MS = float(os.environ.get("IPPANEL_IMPORT_BUDGET_MS", 75))
+# modules only loaded once a request is made with their transport
+HEAVY_MODULES = ("requests", "httpx", "asyncio", "ssl")
+
+
+def _run(*args):
+    return subprocess.run([sys.executable, *args], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True, check=True, cwd=ROOT)
+
+
+def _import_times(statement):
+    """
+    cumulative microseconds of each top level import made by statement
+    """
+    times = {}
+    for line in _run("-X", "importtime", "-c", statement).stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # nested imports are indented below their parent
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestImport(unittest.TestCase):
+    @unittest.skipIf(sys.version_info < (3, 7), "-X importtime needs python 3.7")
+    def test_import_time_budget(self):
+        startup = _import_times("pass")
+        times = _import_times("from ippanel import Client; Client('')")
+        total = sum(us for name, us in times.items() if name not in startup) / 1000
+
+        self.assertLess(total, IMPORT_BUDGET_MS, f"importing client took {total:.1f}ms: {times}")
+
+    @unittest.skipIf(sys.version_info < (3, 7), "python 3.6 imports transports up front")
+    def test_transports_loaded_lazily(self):
+        output = _run("-c", (
+            "import sys; from ippanel import Client, Response, Error; Client(''); "
+            f"print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+        )).stdout.strip()
+
+        self.assertEqual(output, "")
+
+    def test_lazy_exports(self):
+        from ippanel.client import Client
+
+        self.assertIs(ippanel.Client, Client)
+        self.assertIn("StdlibHTTPClient", dir(ippanel))
+        with self.assertRaises(AttributeError):
+            ippanel.Missing
+
+
+if __name__ == "__main__":
+    unittest.main()
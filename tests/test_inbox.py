@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+from ippanel import InboxMessage, InboxSync
+
+
+class _Inbox:
+    """
+    inbox of a fake client, newest messages first
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.requests = []
+
+    def receive(self, count):
+        start = len(self.messages)
+        for index in range(start, start + count):
+            self.messages.insert(0, InboxMessage({
+                "to": "9810001",
+                "message": f"reply {index}",
+                "from": "98912xxxxxxx",
+                "created_at": f"2026-01-01T00:{index // 60:02d}:{index % 60:02d}",
+                "type": "normal",
+            }))
+
+    def fetch_inbox(self, page=0, limit=10, result_format="object"):
+        self.requests.append(page)
+        return self.messages[page * limit:(page + 1) * limit], None
+
+
+class TestInboxSync(unittest.TestCase):
+    def test_poll_yields_only_new_messages(self):
+        client = _Inbox()
+        client.receive(25)
+        sync = InboxSync(client, page_size=10)
+
+        messages = sync.poll()
+        self.assertEqual([m.message for m in messages], [f"reply {i}" for i in range(25)])
+        self.assertEqual(client.requests, [0, 1, 2])
+
+        client.requests = []
+        self.assertEqual(sync.poll(), [])
+        self.assertEqual(client.requests, [0])
+
+        client.receive(3)
+        client.requests = []
+        self.assertEqual([m.message for m in sync.poll()], ["reply 25", "reply 26", "reply 27"])
+        self.assertEqual(client.requests, [0])
+
+    def test_same_created_at_deduplicated(self):
+        client = _Inbox()
+        client.receive(2)
+        sync = InboxSync(client)
+        sync.poll()
+
+        message = InboxMessage({
+            "to": "9810001",
+            "message": "other reply",
+            "from": "98912xxxxxxx",
+            "created_at": client.messages[0].created_at,
+            "type": "normal",
+        })
+        client.messages.insert(0, message)
+
+        self.assertEqual([m.message for m in sync.poll()], ["other reply"])
+
+    def test_max_pages_resumes(self):
+        client = _Inbox()
+        client.receive(5)
+        sync = InboxSync(client, page_size=2, max_pages=1)
+        received = sync.poll()
+        client.receive(5)
+
+        for _ in range(3):
+            received += sync.poll()
+        # messages received while a poll is resumed are not skipped either
+        client.receive(5)
+        for _ in range(20):
+            messages = sync.poll()
+            if not messages and sync.resume_page is None:
+                break
+            received += messages
+
+        self.assertEqual(sorted(m.message for m in received), sorted(f"reply {i}" for i in range(15)))
+        self.assertIsNone(sync.resume_page)
+
+    def test_state_file(self):
+        client = _Inbox()
+        client.receive(5)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "inbox.json")
+            self.assertEqual(len(InboxSync(client, path).poll()), 5)
+
+            client.receive(1)
+            self.assertEqual([m.message for m in InboxSync(client, path).poll()], ["reply 5"])
+
+
+if __name__ == "__main__":
+    unittest.main()
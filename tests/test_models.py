@@ -0,0 +1,47 @@
+import unittest
+from ippanel import InboxMessage, Recipient, Response
+
+
+class TestModels(unittest.TestCase):
+    def test_slots(self):
+        recipient = Recipient({"recipient": "+98912xxxxxxx", "status": "delivered", "unknown": 1})
+
+        self.assertFalse(hasattr(recipient, "__dict__"))
+        self.assertFalse(hasattr(recipient, "unknown"))
+        self.assertEqual(repr(recipient), str({"recipient": "+98912xxxxxxx", "status": "delivered"}))
+
+    def test_from_list(self):
+        messages = InboxMessage.from_list([
+            {"to": "+9810001", "message": "Hello", "from": "+98912xxxxxxx"},
+            {"to": "+9810001", "type": "normal"},
+        ])
+
+        self.assertEqual(messages[0].sender, "+98912xxxxxxx")
+        self.assertIsNone(messages[0].type)
+        self.assertIsNone(messages[1].sender)
+        self.assertEqual(messages[1].type, "normal")
+
+    def test_response_meta(self):
+        response = Response({"code": 200, "data": [], "meta": {"total": 3, "pages": 1}})
+
+        self.assertEqual(response.meta.total, 3)
+        self.assertIsNone(response.error_message)
+
+    def test_result_formats(self):
+        items = [
+            {"to": "+9810001", "message": "Hello", "from": "+98912xxxxxxx"},
+            {"to": "+9810002", "type": "normal"},
+        ]
+
+        rows = InboxMessage.build(items, "tuple")
+        self.assertEqual(rows[0].sender, "+98912xxxxxxx")
+        self.assertEqual(rows[1], ("+9810002", None, None, None, "normal"))
+
+        columns = InboxMessage.build(items, "columns")
+        columns.extend(InboxMessage.build(items[:1], "columns"))
+        self.assertEqual(len(columns), 3)
+        self.assertEqual(columns["to"], ["+9810001", "+9810002", "+9810001"])
+        self.assertEqual(list(columns)[2], rows[0])
+
+        with self.assertRaises(ValueError):
+            InboxMessage.build(items, "frame")
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import time
+import unittest
+from ippanel import Client, Error, HTTPError, Outbox
+from tests import message_id_response
+from unittest import mock
+
+
+class TestOutbox(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "outbox.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_drain(self):
+        def post(url, data):
+            if data["recipient"] == "rejected":
+                raise Error(422, {"recipient": ["invalid"]})
+            return message_id_response(1000 + len(data["recipient"]))
+
+        http_client = mock.MagicMock()
+        http_client.post.side_effect = post
+        sms = Client("", http_client)
+
+        with Outbox(self.path) as outbox:
+            send_id = outbox.enqueue_send("9810001", ["98912xxxxxxx", "98913xxxxxxx"], "Hello", "summary")
+            pattern_id = outbox.enqueue_pattern("6gr7ngjmhi", "9810001", "+98912xxxxxxx", {"name": "IPPanel"})
+            rejected_id = outbox.enqueue_pattern("6gr7ngjmhi", "9810001", "rejected", {})
+
+            counts = outbox.drain(sms, batch_size=2, concurrency=2)
+
+            self.assertEqual(counts, {"sent": 2, "failed": 1, "pending": 0})
+            self.assertEqual(outbox.get(send_id)[:2], ("sent", 1002))
+            self.assertEqual(outbox.get(pattern_id)[:2], ("sent", 1013))
+            self.assertEqual(outbox.get(rejected_id)[0], "failed")
+            self.assertEqual(outbox.drain(sms), {"sent": 0, "failed": 0, "pending": 0})
+
+        self.assertEqual(http_client.post.call_count, 3)
+
+    def test_network_errors_retried(self):
+        http_client = mock.MagicMock()
+        http_client.post.side_effect = [HTTPError("connection reset"), message_id_response(1)]
+
+        with Outbox(self.path, max_attempts=2, retry_delay=0) as outbox:
+            outbox_id = outbox.enqueue_pattern("6gr7ngjmhi", "9810001", "+98912xxxxxxx", {})
+            counts = outbox.drain(Client("", http_client))
+
+            self.assertEqual(counts, {"sent": 1, "failed": 0, "pending": 0})
+            self.assertEqual(outbox.get(outbox_id)[:2], ("sent", 1))
+
+    def test_network_errors_wait_retry_delay(self):
+        http_client = mock.MagicMock()
+        http_client.post.side_effect = HTTPError("connection reset")
+        sms = Client("", http_client)
+
+        with Outbox(self.path, max_attempts=3, retry_delay=60) as outbox:
+            ids = outbox.enqueue([("pattern", ["6gr7ngjmhi", "9810001", f"+98912{i}", {}]) for i in range(5)])
+
+            self.assertEqual(outbox.drain(sms), {"sent": 0, "failed": 0, "pending": 5})
+            self.assertEqual(http_client.post.call_count, 5)
+            self.assertEqual(outbox.counts(), {"pending": 5})
+            # requeued messages are not due yet
+            self.assertEqual(outbox.claim(), [])
+
+            with mock.patch("ippanel.outbox.time.time", return_value=time.time() + 61):
+                self.assertEqual([item[0] for item in outbox.claim()], ids)
+
+    def test_resume_after_crash(self):
+        with Outbox(self.path, lease=60) as outbox:
+            ids = outbox.enqueue([("pattern", ["6gr7ngjmhi", "9810001", f"+98912{i}", {}]) for i in range(3)])
+            # process died after claiming
+            outbox.claim(2)
+
+        http_client = mock.MagicMock()
+        http_client.post.return_value = message_id_response(1)
+
+        with Outbox(self.path, lease=60) as outbox:
+            self.assertEqual(outbox.drain(Client("", http_client))["sent"], 1)
+            self.assertEqual(outbox.counts(), {"sending": 2, "sent": 1})
+
+        with Outbox(self.path, lease=0) as outbox:
+            self.assertEqual(outbox.drain(Client("", http_client))["sent"], 2)
+            self.assertEqual([outbox.get(outbox_id)[0] for outbox_id in ids], ["sent"] * 3)
+
+    def test_drain_duck_typed_client(self):
+        class Sender:
+            def send_pattern(self, pattern_code, sender, recipient, values):
+                return 7
+
+        with Outbox(self.path) as outbox:
+            outbox_id = outbox.enqueue_pattern("6gr7ngjmhi", "9810001", "+98912xxxxxxx", {})
+            self.assertEqual(outbox.drain(Sender()), {"sent": 1, "failed": 0, "pending": 0})
+            self.assertEqual(outbox.get(outbox_id)[:2], ("sent", 7))
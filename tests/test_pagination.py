@@ -0,0 +1,92 @@
+import threading
+import unittest
+from ippanel import AsyncClient, Client, Response
+from unittest import mock
+
+
+def _statuses_response(page, per_page, total, with_pages=True):
+    start = page * per_page
+    pages = (total + per_page - 1) // per_page
+    return Response({
+        "status": "OK",
+        "code": 200,
+        "error_message": "",
+        "data": {
+            "deliveries": [
+                {"recipient": f"+98912{i:07d}", "status": "delivered"}
+                for i in range(start, min(start + per_page, total))
+            ]
+        },
+        "meta": {
+            "total": total,
+            "pages": pages if with_pages else None,
+            "limit": per_page,
+            "page": page,
+            "prev": None,
+            "next": page + 1 if page + 1 < pages else None,
+        },
+    })
+
+
+class TestPagination(unittest.TestCase):
+    def test_iter_statuses(self):
+        requested = []
+        lock = threading.Lock()
+
+        def get(url, params):
+            with lock:
+                requested.append(params["page"])
+            return _statuses_response(params["page"], params["per_page"], 25)
+
+        http_client = mock.MagicMock()
+        http_client.get.side_effect = get
+
+        sms = Client("", http_client)
+        recipients = list(sms.iter_statuses(52738671, page_size=10, prefetch=2))
+
+        self.assertEqual(len(recipients), 25)
+        self.assertEqual(recipients[24].recipient, "+989120000024")
+        self.assertEqual(sorted(requested), [0, 1, 2])
+
+    def test_iter_statuses_without_page_count(self):
+        http_client = mock.MagicMock()
+        http_client.get.side_effect = lambda url, params: _statuses_response(
+            params["page"], params["per_page"], 25, with_pages=False)
+
+        sms = Client("", http_client)
+        recipients = list(sms.iter_statuses(52738671, page_size=10, prefetch=0))
+
+        self.assertEqual(len(recipients), 25)
+        self.assertEqual(http_client.get.call_count, 3)
+
+    def test_stop_early(self):
+        http_client = mock.MagicMock()
+        http_client.get.side_effect = lambda url, params: _statuses_response(params["page"], params["per_page"], 1000)
+
+        sms = Client("", http_client)
+        statuses = sms.iter_statuses(52738671, page_size=10, prefetch=3)
+        next(statuses)
+        statuses.close()
+
+        self.assertLessEqual(http_client.get.call_count, 4)
+
+
+class TestAsyncPagination(unittest.IsolatedAsyncioTestCase):
+    async def test_iter_statuses(self):
+        http_client = mock.AsyncMock()
+        http_client.get.side_effect = lambda url, params: _statuses_response(params["page"], params["per_page"], 25)
+
+        sms = AsyncClient("", http_client)
+        recipients = [r async for r in sms.iter_statuses(52738671, page_size=10, prefetch=2)]
+
+        self.assertEqual([r.recipient for r in recipients], [f"+98912{i:07d}" for i in range(25)])
+
+    async def test_iter_statuses_columns(self):
+        http_client = mock.AsyncMock()
+        http_client.get.side_effect = lambda url, params: _statuses_response(params["page"], params["per_page"], 25)
+
+        sms = AsyncClient("", http_client)
+        pages = [columns async for columns in sms.iter_statuses(52738671, page_size=10, result_format="columns")]
+
+        self.assertEqual([len(columns) for columns in pages], [10, 10, 5])
+        self.assertEqual(pages[2]["recipient"][-1], "+989120000024")
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+from ippanel import Client, Error, PatternRegistry, ResponseCode
+from tests import message_id_response, ok_response
+from unittest import mock
+
+
+class TestPatternRegistry(unittest.TestCase):
+    def test_validate_before_send(self):
+        http_client = mock.MagicMock()
+        http_client.post.return_value = ok_response([{"code": "6gr7ngjmhi"}])
+
+        sms = Client("", http_client, patterns=PatternRegistry())
+        sms.create_pattern(r"%name% is awesome, your code is %code%", "description",
+                           {"name": "string", "code": "integer"})
+
+        http_client.post.return_value = message_id_response(70671101)
+        with self.assertRaises(Error) as context:
+            sms.send_pattern("6gr7ngjmhi", "9810001", "+98912xxxxxxx", {"code": "12a", "extra": 1})
+
+        self.assertEqual(context.exception.code, ResponseCode.ErrUnprocessableEntity.value)
+        self.assertEqual(set(context.exception.message), {"name", "code", "extra"})
+        self.assertEqual(http_client.post.call_count, 1)
+
+        message_id = sms.send_pattern("6gr7ngjmhi", "9810001", "+98912xxxxxxx", {"name": 7, "code": "0123"})
+        self.assertEqual(message_id, 70671101)
+        self.assertEqual(http_client.post.call_args[0][1]["variable"], {"name": "7", "code": "0123"})
+
+    def test_undeclared_variables_rejected(self):
+        http_client = mock.MagicMock()
+        sms = Client("", http_client, patterns=PatternRegistry())
+
+        with self.assertRaises(ValueError):
+            sms.create_pattern("hi %name% code %code%", "description", {"name": "string"})
+        with self.assertRaises(ValueError):
+            PatternRegistry().register("6gr7ngjmhi", "hi %name% code %code%", {"name": "string"})
+        http_client.post.assert_not_called()
+
+    def test_unknown_pattern_not_validated(self):
+        registry = PatternRegistry()
+
+        self.assertEqual(registry.validate("unknown", {"anything": [1]}), {"anything": [1]})
+
+    def test_persist(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "patterns.json")
+            PatternRegistry(path).register("6gr7ngjmhi", "کد شما %code% است", {"code": "integer"})
+
+            registry = PatternRegistry(path)
+
+        self.assertIn("6gr7ngjmhi", registry)
+        self.assertEqual(registry.get("6gr7ngjmhi").render({"code": 12}), "کد شما 12 است")
+        with self.assertRaises(Error):
+            registry.validate("6gr7ngjmhi", {"code": 1.5})
@@ -0,0 +1,44 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+from ippanel import FileTokenBucket, RateLimiter, TokenBucket
+
+
+def _reserve_many(path, count, queue):
+    bucket = FileTokenBucket(path, rate=10, capacity=10)
+    queue.put([bucket.reserve() for _ in range(count)])
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_reserve(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertAlmostEqual(bucket.reserve(), 0.1, places=2)
+        self.assertAlmostEqual(bucket.reserve(), 0.2, places=2)
+
+    def test_rate_limiter_classes(self):
+        send = TokenBucket(rate=1, capacity=1)
+        limiter = RateLimiter(send=send)
+
+        self.assertEqual(limiter.reserve("POST", "sms/pattern/normal/send"), 0)
+        self.assertGreater(limiter.reserve("POST", "sms/pattern/normal/send"), 0)
+        self.assertEqual(limiter.reserve("GET", "sms/accounting/credit/show"), 0)
+
+    @unittest.skipIf(os.name != "posix", "file lock needs posix")
+    def test_file_bucket_shared_by_processes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "bucket")
+            queue = multiprocessing.Queue()
+            processes = [multiprocessing.Process(target=_reserve_many, args=(path, 5, queue)) for _ in range(3)]
+            for process in processes:
+                process.start()
+            waits = sorted(sum((queue.get(timeout=10) for _ in processes), []))
+            for process in processes:
+                process.join()
+
+        # 10 tokens of the capacity are free, the other 5 are handed out in 0.1s steps
+        self.assertEqual(waits[:10], [0.0] * 10)
+        self.assertAlmostEqual(waits[-1], 0.5, delta=0.1)
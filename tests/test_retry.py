@@ -0,0 +1,33 @@
+import unittest
+from ippanel import RetryPolicy
+from ippanel.retry import parse_retry_after
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_idempotent_requests(self):
+        retry = RetryPolicy(max_attempts=3, backoff_factor=1, jitter=False)
+
+        self.assertEqual(retry.next_delay("GET", 1, status=500), 1)
+        self.assertEqual(retry.next_delay("GET", 2), 2)
+        self.assertIsNone(retry.next_delay("GET", 3, status=500))
+        self.assertIsNone(retry.next_delay("GET", 1, status=404))
+
+    def test_post_only_retried_before_reaching_server(self):
+        retry = RetryPolicy(max_attempts=3, backoff_factor=1, jitter=False)
+
+        self.assertIsNone(retry.next_delay("POST", 1, status=500))
+        self.assertIsNone(retry.next_delay("POST", 1))
+        self.assertEqual(retry.next_delay("POST", 1, connection_error=True), 1)
+        self.assertEqual(retry.next_delay("POST", 1, status=429, retry_after=5), 5)
+
+    def test_retry_after_over_limit(self):
+        retry = RetryPolicy(max_backoff=10)
+
+        self.assertIsNone(retry.next_delay("GET", 1, status=503, retry_after=60))
+        self.assertEqual(retry.stats["exhausted"], 1)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("3"), 3)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
@@ -0,0 +1,40 @@
+import unittest
+from ippanel.segments import GSM7, UCS2, Template, count_parts, count_parts_many, estimate_cost, segments
+
+
+class TestSegments(unittest.TestCase):
+    def test_gsm7(self):
+        self.assertEqual(segments("Hello"), (GSM7, 5, 1))
+        self.assertEqual(count_parts("a" * 160), 1)
+        self.assertEqual(count_parts("a" * 161), 2)
+        self.assertEqual(count_parts("a" * 307), 3)
+        # extension characters take two septets
+        self.assertEqual(segments("{code}"), (GSM7, 8, 1))
+        self.assertEqual(count_parts("€" * 80), 1)
+        self.assertEqual(count_parts("€" * 81), 2)
+
+    def test_ucs2(self):
+        self.assertEqual(segments("سلام"), (UCS2, 4, 1))
+        self.assertEqual(count_parts("س" * 70), 1)
+        self.assertEqual(count_parts("س" * 71), 2)
+        self.assertEqual(count_parts("a" * 159 + "`"), 3)
+        # emoji takes two utf-16 units
+        self.assertEqual(segments("hi 😀"), (UCS2, 5, 1))
+
+    def test_batch(self):
+        texts = ["Hello", "س" * 71, "a" * 161, "{" * 81]
+
+        self.assertEqual(count_parts_many(texts), [count_parts(text) for text in texts])
+        self.assertEqual(estimate_cost(texts, 10), (7, 70))
+
+    def test_template(self):
+        template = Template("%name% عزیز، کد شما %code% است")
+
+        self.assertEqual(template.variables, ("name", "code"))
+        self.assertEqual(template.render({"name": "Ali", "code": 1234}), "Ali عزیز، کد شما 1234 است")
+        self.assertEqual(list(template.render_many([{"name": "a", "code": 1}, {"name": "b", "code": 2}]))[1],
+                         "b عزیز، کد شما 2 است")
+        self.assertEqual(template.estimate_cost([{"name": "a", "code": 1}] * 3, 5), (3, 15))
+
+        with self.assertRaises(ValueError):
+            template.render({"name": "Ali"})
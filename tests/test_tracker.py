@@ -0,0 +1,160 @@
+import threading
+import time
+import unittest
+from ippanel import AsyncDeliveryTracker, DeliveryTracker, HTTPError, Message
+from unittest import mock
+
+
+def _message(message_id, state):
+    return Message({"message_id": message_id, "state": state})
+
+
+def _client(states, client=None):
+    """
+    client whose get_message returns the next state of a message on every call
+    """
+    states = {message_id: iter(items) for message_id, items in states.items()}
+    lock = threading.Lock()
+
+    def get_message(message_id):
+        with lock:
+            state = next(states[message_id])
+        if isinstance(state, Exception):
+            raise state
+        return _message(message_id, state)
+
+    client = client or mock.MagicMock()
+    client.get_message.side_effect = get_message
+    return client
+
+
+class TestDeliveryTracker(unittest.TestCase):
+    def test_events_until_final(self):
+        client = _client({
+            1: ["active", "active", "finish"],
+            2: [HTTPError("connection reset"), "failed"],
+        })
+        tracker = DeliveryTracker(client, min_interval=0, concurrency=2)
+        tracker.track(1)
+        tracker.track(2)
+
+        changes = list(tracker.events())
+        errors = [change for change in changes if change.error is not None]
+
+        self.assertEqual({(change.message_id, change.previous, change.state, change.final)
+                          for change in changes if change.error is None}, {
+            (1, None, "active", False),
+            (1, "active", "finish", True),
+            (2, None, "failed", True),
+        })
+        self.assertEqual([(change.message_id, change.state, change.message, change.final) for change in errors],
+                         [(2, None, None, False)])
+        self.assertIsInstance(errors[0].error, HTTPError)
+        self.assertEqual(len(tracker), 0)
+        self.assertEqual(client.get_message.call_count, 5)
+
+    def test_backoff(self):
+        client = _client({1: ["active"] * 4 + ["finish"]})
+        tracker = DeliveryTracker(client, min_interval=10, max_interval=30, backoff=2)
+        seen = []
+        tracker.subscribe(seen.append)
+        tracker.track(1)
+
+        self.assertEqual(len(tracker.poll()), 1)
+        self.assertEqual(tracker.poll(), [])
+        self.assertEqual(client.get_message.call_count, 1)
+
+        # unchanged states double the interval up to max_interval
+        intervals = []
+        now = time.monotonic()
+        for _ in range(3):
+            self.assertEqual(tracker._update(1, _message(1, "active"), None, now), None)
+            intervals.append(tracker._next_wait(now))
+        self.assertEqual(intervals, [20, 30, 30])
+
+        change = tracker._update(1, _message(1, "finish"), None, now)
+        self.assertTrue(change.final)
+        self.assertNotIn(1, tracker)
+        self.assertEqual([change.state for change in seen], ["active", "finish"])
+
+    def test_background_thread(self):
+        client = _client({1: ["finish"]})
+        done = threading.Event()
+        tracker = DeliveryTracker(client, min_interval=0)
+        tracker.subscribe(lambda change: done.set())
+
+        with tracker:
+            tracker.track(1)
+            self.assertTrue(done.wait(5))
+
+    def test_errors_published(self):
+        client = _client({1: ["active", HTTPError("401 Unauthorized"), "active"]})
+        tracker = DeliveryTracker(client, min_interval=0)
+        errors = []
+        tracker.subscribe(lambda change: change.error is not None and errors.append(change))
+        tracker.track(1)
+
+        tracker.poll()
+        self.assertEqual([(change.previous, change.state) for change in tracker.poll()], [("active", "active")])
+        self.assertEqual(str(errors[0].error), "401 Unauthorized")
+        # a poll succeeding again with the same state is not a change
+        self.assertEqual(tracker.poll(), [])
+        self.assertIn(1, tracker)
+
+    def test_failing_callback(self):
+        client = _client({message_id: ["active", "finish"] for message_id in range(3)})
+        tracker = DeliveryTracker(client, min_interval=0, concurrency=1)
+
+        def callback(change):
+            raise RuntimeError("subscriber failed")
+
+        tracker.subscribe(callback)
+        for message_id in range(3):
+            tracker.track(message_id)
+
+        with self.assertLogs("ippanel.tracker", "ERROR"):
+            self.assertEqual(len(tracker.poll()), 3)
+            self.assertEqual(len(tracker.poll()), 3)
+        self.assertEqual(len(tracker), 0)
+
+    def test_failed_poll_requeued(self):
+        client = _client({message_id: ["active"] for message_id in range(3)})
+        get_message = client.get_message.side_effect
+        calls = []
+
+        def fail_once(message_id):
+            calls.append(message_id)
+            if len(calls) == 1:
+                raise RuntimeError("client failed")
+            return get_message(message_id)
+
+        client.get_message.side_effect = fail_once
+        tracker = DeliveryTracker(client, min_interval=0, concurrency=1)
+        for message_id in range(3):
+            tracker.track(message_id)
+
+        with self.assertRaises(RuntimeError):
+            tracker.poll()
+        self.assertEqual({change.message_id for change in tracker.poll()}, {0, 1, 2})
+
+
+class TestAsyncDeliveryTracker(unittest.IsolatedAsyncioTestCase):
+    async def test_events(self):
+        states = {1: ["active", "finish"]}
+        sync = _client(states)
+        client = mock.MagicMock()
+
+        async def get_message(message_id):
+            return sync.get_message(message_id)
+
+        client.get_message.side_effect = get_message
+        tracker = AsyncDeliveryTracker(client, min_interval=0, rate=1000)
+        tracker.track(1)
+
+        states = [change.state async for change in tracker.events()]
+        self.assertEqual(states, ["active", "finish"])
+        self.assertFalse(hasattr(tracker, "start"))
+
+
+if __name__ == "__main__":
+    unittest.main()